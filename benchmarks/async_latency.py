@@ -0,0 +1,119 @@
+"""Latency and throughput of the week_6 API: sync Flask-RESTful under gunicorn vs ASGI under uvicorn.
+
+Both servers run against the same scratch database, with the sync app's
+response cache off by default. The client opens --clients keep-alive
+connections at once from a single asyncio loop and issues GETs over them
+for --duration seconds.
+
+    python benchmarks/async_latency.py --clients 1000 --duration 15 --workers 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from harness import ROOT, load_app, percentile, populate
+from load_test import free_port, wait_until_up
+
+
+async def client(port, n_students, deadline, latencies, errors):
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    except OSError:
+        errors.append('connect')
+        return
+    try:
+        while time.monotonic() < deadline:
+            path = f"/api/student/{random.randint(1, n_students)}"
+            start = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+            await writer.drain()
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if not head.startswith(b"HTTP/1.1 200"):
+                errors.append(head.split(b"\r\n", 1)[0])
+    except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError) as exc:
+        errors.append(type(exc).__name__)
+    finally:
+        writer.close()
+
+
+async def drive(port, clients, duration, n_students):
+    latencies, errors = [], []
+    deadline = time.monotonic() + duration
+    started = time.monotonic()
+    await asyncio.gather(*(client(port, n_students, deadline, latencies, errors) for _ in range(clients)))
+    elapsed = time.monotonic() - started
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 2) if latencies else None,
+    }
+
+
+def server_command(mode, workdir, port, workers, threads, response_cache):
+    if mode == 'sync':
+        return [sys.executable, '-m', 'gunicorn', '-c', os.path.join(ROOT, 'deploy', 'gunicorn.conf.py'),
+                '--chdir', workdir, 'app:create_app()'], dict(os.environ, WEB_BIND=f'127.0.0.1:{port}',
+                                                              WEB_WORKERS=str(workers), WEB_THREADS=str(threads),
+                                                              RESPONSE_CACHE=response_cache)
+    return [sys.executable, '-m', 'uvicorn', '--app-dir', workdir, 'asgi:app', '--port', str(port),
+            '--workers', str(workers), '--no-access-log', '--log-level', 'warning'], dict(os.environ)
+
+
+def run_mode(mode, workdir, args):
+    port = free_port()
+    command, env = server_command(mode, workdir, port, args.workers, args.threads, args.response_cache)
+    server = subprocess.Popen(command, cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_up(port)
+        return asyncio.run(drive(port, args.clients, args.duration, args.students))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--threads', type=int, default=8, help="gunicorn threads per worker (sync mode)")
+    parser.add_argument('--students', type=int, default=10000)
+    parser.add_argument('--response-cache', default='none',
+                        help="RESPONSE_CACHE for the sync app; the ASGI app has no cache, so 'none' compares like for like")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        module = load_app('week_6', scratch)
+        populate(module, args.students, 100, 3)
+        with module.app.app_context():
+            module.db.engine.dispose()
+        workdir = os.path.dirname(module.__file__)
+        results = {mode: run_mode(mode, workdir, args) for mode in ('sync', 'async')}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for mode, result in results.items():
+        print(f"{mode:5} {result['rps']:9.1f} req/s  p50 {result['p50_ms']} ms  p99 {result['p99_ms']} ms"
+              f"  ({result['requests']} requests, {result['errors']} errors)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Fail when a cached week_6 GET still answers with data a write has changed.
+
+    python benchmarks/cache_invalidation.py
+
+Each scenario warms the response cache with some GETs, makes a write, and
+compares every GET with the answer of an uncached app on the same database.
+A second app with its own cache stands in for another gunicorn worker: it
+never sees the write, only the shared key versions.
+"""
+import sys
+import tempfile
+
+from sqlalchemy import insert
+
+from harness import load_app, populate
+
+
+# (description, GETs cached beforehand, write)
+SCENARIOS = [
+    ("delete a course with enrollments",
+     ['/api/student/1/course', '/api/student/2/course', '/api/course/1'],
+     ('delete', '/api/course/1', None)),
+    ("delete a student",
+     ['/api/student/3', '/api/student/3/course'],
+     ('delete', '/api/student/3', None)),
+    ("enroll a student",
+     ['/api/student/4/course'],
+     ('post', '/api/student/4/course', {"course_id": 5})),
+    ("rename a course",
+     ['/api/course/2'],
+     ('put', '/api/course/2', {"course_code": "RENAMED", "course_name": "Renamed"})),
+]
+
+
+ENROLLMENTS = [(1, 1), (2, 1), (3, 1), (3, 2), (4, 1), (4, 2)]
+
+
+def enroll(module, pairs):
+    with module.app.app_context():
+        module.db.session.execute(insert(module.Enrollment),
+                                  [{'student_id': student_id, 'course_id': course_id} for student_id, course_id in pairs])
+        module.db.session.commit()
+
+
+def answer(client, path):
+    response = client.get(path)
+    return response.status_code, response.get_json()
+
+
+def check_scenarios(module, scenarios):
+    cached = module.app.test_client()
+    other_worker = module.create_app().test_client()
+    uncached = module.create_app({'RESPONSE_CACHE': 'none'}).test_client()
+    failures = []
+    for description, paths, (method, write_path, body) in scenarios:
+        for client in (cached, other_worker):
+            for path in paths:
+                answer(client, path)
+        response = getattr(cached, method)(write_path, json=body)
+        stale = [f"{path} ({name})" for name, client in (('this worker', cached), ('other worker', other_worker))
+                 for path in paths if answer(client, path) != answer(uncached, path)]
+        status = 'ok' if response.status_code < 300 and not stale else 'FAIL'
+        print(f"{status:4} {description} ({response.status_code})")
+        if status != 'ok':
+            failures.append((description, stale))
+    return failures
+
+
+def main():
+    with tempfile.TemporaryDirectory() as scratch:
+        module = load_app('week_6', scratch)
+        populate(module, n_students=20, n_courses=10, per_student=0)
+        enroll(module, ENROLLMENTS)
+        failures = check_scenarios(module, SCENARIOS)
+
+    for description, stale in failures:
+        print(f"\n{description}: stale {', '.join(stale) or '(write failed)'}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Course statistics: the per-course Python loop vs the vectorized common/course_stats module.
+
+The loop baseline builds each course's marks list the way course_page used
+to (a comprehension over the course's rows) and derives the same figures
+with sum/max/sorted and the statistics module. Both are timed for a single
+course, as one course page needs, and for every course at once.
+
+    python benchmarks/course_statistics.py --students 200000 --courses 200
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from harness import ROOT, write_marks_csv
+
+
+def loop_statistics(store, c_id, percentiles, bands):
+    c_data = [store.marks[r] for r in store.course_rows.rows(c_id)]
+    ordered = sorted(c_data)
+    n = len(ordered)
+    result = {'mean': sum(c_data) / n, 'maximum': max(c_data), 'stddev': statistics.pstdev(c_data)}
+    for pct in percentiles:
+        position = (n - 1) * pct / 100
+        lower = int(position)
+        upper = min(lower + 1, n - 1)
+        result[pct] = ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+    grades = {name: 0 for name, _ in bands}
+    for mark in c_data:
+        for name, low in bands:
+            if mark >= low:
+                grades[name] += 1
+                break
+    result['grades'] = grades
+    return result
+
+
+def best_of(repeat, fn, *args):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=200000)
+    parser.add_argument('--courses', type=int, default=200)
+    parser.add_argument('--per-student', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from common.course_stats import GRADE_BANDS, PERCENTILES, course_statistics
+    from common.marks_store import load_store
+
+    with tempfile.TemporaryDirectory() as scratch:
+        csv_path = os.path.join(scratch, 'data.csv')
+        write_marks_csv(csv_path, args.students, args.courses, args.per_student)
+        store = load_store(csv_path, use_cache=False)
+
+    c_ids = sorted(store.course_rows)
+    one = c_ids[0]
+    vectorized, loop = course_statistics(store, one), loop_statistics(store, one, PERCENTILES, GRADE_BANDS)
+    assert vectorized.grades == loop['grades'] and vectorized.maximum == loop['maximum']
+    assert abs(vectorized.mean - loop['mean']) < 1e-9 and abs(vectorized.stddev - loop['stddev']) < 1e-9
+    assert all(abs(vectorized.percentiles[pct] - loop[pct]) < 1e-9 for pct in PERCENTILES)
+
+    def loop_all():
+        for c_id in c_ids:
+            loop_statistics(store, c_id, PERCENTILES, GRADE_BANDS)
+
+    results = {
+        'rows': len(store),
+        'courses': len(c_ids),
+        'one_course': {
+            'loop_ms': best_of(args.repeat, loop_statistics, store, one, PERCENTILES, GRADE_BANDS) * 1000,
+            'vectorized_ms': best_of(args.repeat, course_statistics, store, one) * 1000,
+        },
+        'all_courses': {
+            'loop_ms': best_of(args.repeat, loop_all) * 1000,
+            'vectorized_ms': best_of(args.repeat, course_statistics, store) * 1000,
+        },
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{results['rows']} rows, {results['courses']} courses")
+    for scope in ('one_course', 'all_courses'):
+        timing = results[scope]
+        print(f"{scope:12} loop {timing['loop_ms']:9.2f} ms  vectorized {timing['vectorized_ms']:8.2f} ms  "
+              f"({timing['loop_ms'] / timing['vectorized_ms']:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
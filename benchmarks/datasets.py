@@ -0,0 +1,48 @@
+"""Generate synthetic datasets of a configurable size for the week apps.
+
+Writes data.csv for week_3/week_4 and a populated student/course/enrollment
+database for each of week_5-week_7, under the same file names the apps use:
+
+    python benchmarks/datasets.py --out /tmp/dataset --students 100000 --courses 500 --per-student 5
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+from harness import DB_FILES, load_app, populate, write_marks_csv
+
+
+def build_database(week, path, n_students, n_courses, per_student, seed=0):
+    with tempfile.TemporaryDirectory() as scratch:
+        module = load_app(week, scratch)
+        populate(module, n_students, n_courses, per_student, seed)
+        with module.app.app_context():
+            with module.db.engine.connect() as conn:
+                conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+            module.db.engine.dispose()
+        shutil.copyfile(os.path.join(os.path.dirname(module.__file__), DB_FILES[week]), path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--out', required=True)
+    parser.add_argument('--students', type=int, default=10000)
+    parser.add_argument('--courses', type=int, default=200)
+    parser.add_argument('--per-student', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    csv_path = os.path.join(args.out, 'data.csv')
+    write_marks_csv(csv_path, args.students, args.courses, args.per_student, args.seed)
+    print(csv_path)
+    for week, filename in sorted(DB_FILES.items()):
+        os.makedirs(os.path.join(args.out, week), exist_ok=True)
+        path = os.path.join(args.out, week, filename)
+        build_database(week, path, args.students, args.courses, args.per_student, args.seed)
+        print(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Shared helpers for loading the week apps against scratch databases."""
+import importlib.util
+import os
+import random
+import shutil
+import sys
+from contextlib import contextmanager
+
+from sqlalchemy import event, insert
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_FILES = {
+    'week_5': 'database.sqlite3',
+    'week_6': 'api_database.sqlite3',
+    'week_7': 'week7_database.sqlite3',
+}
+
+
+def copy_week(week, scratch):
+    workdir = os.path.join(scratch, week)
+    shutil.copytree(os.path.join(ROOT, week), workdir,
+                    ignore=shutil.ignore_patterns('static', 'reports', '*.marks', '__pycache__'))
+    # The apps import common/ from the directory above their own.
+    shutil.copytree(os.path.join(ROOT, 'common'), os.path.join(scratch, 'common'),
+                    ignore=shutil.ignore_patterns('__pycache__'), dirs_exist_ok=True)
+    return workdir
+
+
+def write_marks_csv(path, n_students, n_courses, per_student, seed=0):
+    """Write a week_3/week_4 style data.csv: student ids from 1001, course ids from 2001."""
+    rng = random.Random(seed)
+    with open(path, 'w') as output:
+        output.write("Student id, Course id, Marks\n")
+        for s_id in range(1001, 1001 + n_students):
+            for c_id in rng.sample(range(2001, 2001 + n_courses), min(per_student, n_courses)):
+                output.write(f"{s_id}, {c_id}, {rng.randint(0, 100)}\n")
+
+
+def load_app(week, scratch, fresh_db=True, prepare=None):
+    """Import ``<week>/app.py`` from a scratch copy so its database and output files are disposable.
+
+    ``prepare(workdir)`` runs before the import, e.g. to swap in a synthetic data.csv.
+    """
+    workdir = copy_week(week, scratch)
+    if fresh_db and week in DB_FILES:
+        os.remove(os.path.join(workdir, DB_FILES[week]))
+    if prepare is not None:
+        prepare(workdir)
+
+    name = f"{week}_app"
+    spec = importlib.util.spec_from_file_location(name, os.path.join(workdir, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    sys.path.insert(0, workdir)
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        os.chdir(cwd)
+        sys.path.remove(workdir)
+
+    if fresh_db and week in DB_FILES:
+        with module.app.app_context():
+            module.db.create_all()
+    return module
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def populate(module, n_students, n_courses, per_student, seed=0):
+    rng = random.Random(seed)
+    students = [{'roll_number': f"R{i:07d}", 'first_name': f"First{i}", 'last_name': f"Last{i}"}
+                for i in range(1, n_students + 1)]
+    courses = [{'course_code': f"C{i:05d}", 'course_name': f"Course {i}", 'course_description': f"About course {i}"}
+               for i in range(1, n_courses + 1)]
+    enrollments = [{'student_id': s, 'course_id': c}
+                   for s in range(1, n_students + 1)
+                   for c in rng.sample(range(1, n_courses + 1), min(per_student, n_courses))]
+
+    with module.app.app_context():
+        session = module.db.session
+        session.execute(insert(module.Student), students)
+        session.execute(insert(module.Course), courses)
+        if enrollments:
+            session.execute(insert(module.Enrollment), enrollments)
+        session.commit()
+
+
+@contextmanager
+def count_queries(engine):
+    """Collect every SQL statement executed on ``engine`` inside the block."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
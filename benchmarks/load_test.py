@@ -0,0 +1,122 @@
+"""Throughput of a week app under gunicorn as the worker count grows.
+
+Starts deploy/gunicorn.conf.py against a scratch copy of the week with a
+synthetic database, then drives it from several client processes over
+keep-alive connections.
+
+    python benchmarks/load_test.py week_7 --workers 1 2 4 --duration 10
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from harness import ROOT, load_app, populate
+
+
+REQUESTS = {
+    'week_4': [('POST', '/', 'ID=student_id&id_value=1001'), ('POST', '/', 'ID=course_id&id_value=2001'),
+               ('GET', '/course/2001/histogram?format=svg', None)],
+    'week_5': [('GET', '/', None), ('GET', '/student/1', None)],
+    'week_6': [('GET', '/api/student/1', None), ('GET', '/api/student/1/course', None)],
+    'week_7': [('GET', '/', None), ('GET', '/student/1', None), ('GET', '/course/1', None)],
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def client(args):
+    port, requests, duration = args
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+    done = errors = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        method, path, body = requests[done % len(requests)]
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 500:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port)
+        done += 1
+    return done, errors
+
+
+def run_level(workdir, week, workers, threads, clients, duration):
+    port = free_port()
+    env = dict(os.environ, WEB_BIND=f'127.0.0.1:{port}', WEB_WORKERS=str(workers), WEB_THREADS=str(threads))
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', os.path.join(ROOT, 'deploy', 'gunicorn.conf.py'),
+         '--chdir', workdir, 'app:create_app()'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_up(port)
+        with multiprocessing.Pool(clients) as pool:
+            results = pool.map(client, [(port, REQUESTS[week], duration)] * clients)
+    finally:
+        server.terminate()
+        server.wait()
+
+    done = sum(r[0] for r in results)
+    return {'workers': workers, 'threads': threads, 'requests': done,
+            'errors': sum(r[1] for r in results), 'rps': round(done / duration, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('week', choices=sorted(REQUESTS))
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--students', type=int, default=10000)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        module = load_app(args.week, scratch)
+        if hasattr(module, 'db'):
+            populate(module, args.students, 200, 5)
+            with module.app.app_context():
+                module.db.engine.dispose()
+        workdir = os.path.dirname(module.__file__)
+        results = [run_level(workdir, args.week, w, args.threads, args.clients, args.duration) for w in args.workers]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    base = results[0]['rps'] or 1
+    for result in results:
+        print(f"{result['workers']:3} workers x {result['threads']} threads: {result['rps']:9.1f} req/s "
+              f"({result['rps'] / base:4.2f}x, {result['errors']} errors)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""Memory held by the week_3/week_4 marks data: the original list of lists vs MarksStore.
+
+Each representation is loaded in a fresh interpreter. tracemalloc reports the
+Python heap the load allocates; then --workers forked children each serve
+student lookups, as gunicorn workers forked after preload_app would, and
+/proc/self/smaps_rollup reports what each worker holds privately (pages it
+had to copy, e.g. because reference counts were written) versus shares.
+
+    python benchmarks/memory.py --students 200000 --workers 4
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+from harness import ROOT, write_marks_csv
+
+
+REPRESENTATIONS = ['lists', 'store', 'mmap']
+
+
+def load_lists(path):
+    # The loader week_3/week_4 started from: one list of three ints per row.
+    data = []
+    with open(path, 'r', encoding="utf-8") as data_file:
+        data_file.readline()
+        for i in data_file.readlines():
+            data.append(list(map(int, i.strip('\n').split(','))))
+    return data
+
+
+def lookup_lists(data, s_id):
+    return [s for s in data if s[0] == s_id]
+
+
+def lookup_store(data, s_id):
+    return [(r.student_id, r.course_id, r.marks) for r in data.student_records(s_id)]
+
+
+def memory_mb():
+    fields = {}
+    try:
+        with open('/proc/self/smaps_rollup') as smaps:
+            for line in smaps:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == 'kB':
+                    fields[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    except OSError:
+        return {}
+    return {'rss_mb': round(fields.get('Rss', 0), 1), 'pss_mb': round(fields.get('Pss', 0), 1),
+            'private_mb': round(fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0), 1)}
+
+
+def measure(representation, csv_path, workers, lookups, n_students):
+    sys.path.insert(0, ROOT)
+    from common.marks_store import MarksStore, load_store, parse_csv
+
+    if representation == 'mmap':
+        load_store(csv_path)  # write the sidecar so the measured load maps it
+
+    tracemalloc.start()
+    if representation == 'lists':
+        data, lookup = load_lists(csv_path), lookup_lists
+    elif representation == 'store':
+        data, lookup = MarksStore.from_columns(*parse_csv(csv_path)), lookup_store
+    else:
+        data, lookup = load_store(csv_path), lookup_store
+    heap, heap_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    parent = memory_mb()
+
+    # A full scan per lookup makes the list version slow, but one scan already touches every row.
+    ids = random.Random(0).sample(range(1001, 1001 + n_students), lookups if representation != 'lists' else 2)
+    children = []
+    for _ in range(workers):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            for s_id in ids:
+                lookup(data, s_id)
+            os.write(write_fd, json.dumps(memory_mb()).encode())
+            os._exit(0)
+        os.close(write_fd)
+        children.append((pid, read_fd))
+
+    worker_memory = []
+    for pid, read_fd in children:
+        with os.fdopen(read_fd) as pipe:
+            worker_memory.append(json.loads(pipe.read() or '{}'))
+        os.waitpid(pid, 0)
+
+    return {
+        'representation': representation,
+        'rows': len(data),
+        'heap_mb': round(heap / 2**20, 1),
+        'heap_peak_mb': round(heap_peak / 2**20, 1),
+        'parent': parent,
+        'workers': worker_memory,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=200000)
+    parser.add_argument('--courses', type=int, default=200)
+    parser.add_argument('--per-student', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--lookups', type=int, default=1000)
+    parser.add_argument('--representations', nargs='+', choices=REPRESENTATIONS, default=REPRESENTATIONS)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as scratch:
+        csv_path = os.path.join(scratch, 'data.csv')
+        write_marks_csv(csv_path, args.students, args.courses, args.per_student)
+        spawn = multiprocessing.get_context('spawn')
+        for representation in args.representations:
+            with ProcessPoolExecutor(1, mp_context=spawn) as pool:
+                results.append(pool.submit(measure, representation, csv_path, args.workers,
+                                           args.lookups, args.students).result())
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for result in results:
+        workers = result['workers']
+        private = sum(w.get('private_mb', 0) for w in workers) / max(1, len(workers))
+        pss = sum(w.get('pss_mb', 0) for w in workers) / max(1, len(workers))
+        print(f"{result['representation']:6} {result['rows']} rows: heap {result['heap_mb']:7.1f} MB "
+              f"(peak {result['heap_peak_mb']:.1f}), parent RSS {result['parent'].get('rss_mb')} MB, "
+              f"per worker: private {private:.1f} MB, PSS {pss:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Per-lookup ORM overhead: ad-hoc Model.query calls vs lambda_stmt vs the repository's prebuilt statements.
+
+Each week app is loaded against a populated scratch database, and the three
+hot lookups (student by id, student by roll_number, course by course_code)
+are run the three ways, each against a session emptied after every call so
+rows are loaded as a fresh request would load them.
+
+    python benchmarks/orm_lookups.py --weeks week_5 week_6 week_7 --lookups 5000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import lambda_stmt, select
+
+from harness import load_app, populate
+
+
+def lookups(module):
+    repo, Student, Course = module.repo, module.Student, module.Course
+    session = module.db.session
+
+    def query_student(i):
+        return Student.query.filter(Student.student_id == i).first()
+
+    def query_roll(i):
+        return Student.query.filter(Student.roll_number == f"R{i:07d}").first()
+
+    def query_code(i):
+        return Course.query.filter(Course.course_code == f"C{i:05d}").first()
+
+    def lambda_student(i):
+        return session.scalars(lambda_stmt(lambda: select(Student).where(Student.student_id == i))).first()
+
+    def lambda_roll(i):
+        roll_number = f"R{i:07d}"
+        return session.scalars(lambda_stmt(lambda: select(Student).where(Student.roll_number == roll_number))).first()
+
+    def lambda_code(i):
+        course_code = f"C{i:05d}"
+        return session.scalars(lambda_stmt(lambda: select(Course).where(Course.course_code == course_code))).first()
+
+    return {
+        'student by id': {'query': query_student, 'lambda_stmt': lambda_student, 'repository': repo.student},
+        'student by roll_number': {'query': query_roll, 'lambda_stmt': lambda_roll,
+                                   'repository': lambda i: repo.student_by_roll(f"R{i:07d}")},
+        'course by course_code': {'query': query_code, 'lambda_stmt': lambda_code,
+                                  'repository': lambda i: repo.course_by_code(f"C{i:05d}")},
+    }
+
+
+def time_lookup(module, lookup, ids, repeat):
+    session = module.db.session
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for i in ids:
+            assert lookup(i) is not None
+            session.expunge_all()
+        elapsed = (time.perf_counter() - start) / len(ids)
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1e6
+
+
+def measure(week, scratch, args):
+    module = load_app(week, os.path.join(scratch, week))
+    populate(module, args.students, args.courses, per_student=2)
+    rng = random.Random(0)
+    results = {}
+    with module.app.app_context():
+        for name, variants in lookups(module).items():
+            limit = args.courses if name.startswith('course') else args.students
+            ids = [rng.randint(1, limit) for _ in range(args.lookups)]
+            # One untimed pass warms the compiled cache for every variant.
+            for lookup in variants.values():
+                time_lookup(module, lookup, ids[:50], 1)
+            results[name] = {variant: round(time_lookup(module, lookup, ids, args.repeat), 1)
+                             for variant, lookup in variants.items()}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--weeks', nargs='+', default=['week_5', 'week_6', 'week_7'])
+    parser.add_argument('--students', type=int, default=10000)
+    parser.add_argument('--courses', type=int, default=200)
+    parser.add_argument('--lookups', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        results = {week: measure(week, scratch, args) for week in args.weeks}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for week, lookups_by_name in results.items():
+        for name, timings in lookups_by_name.items():
+            print(f"{week}  {name:24} " + "  ".join(f"{variant} {us:6.1f} us" for variant, us in timings.items())
+                  + f"  ({timings['query'] / timings['repository']:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Fail when a week_7 page issues more SQL statements than its budget.
+
+    python benchmarks/query_budget.py
+"""
+import sys
+import tempfile
+
+from harness import count_queries, load_app, populate
+
+
+BUDGETS = [
+    ('/', 2),
+    ('/courses', 2),
+    ('/student/1', 1),
+    ('/course/1', 1),
+    ('/student/1/update', 2),
+    ('/student/create', 1),
+    ('/course/1/update', 1),
+]
+
+
+def check_budgets(module, budgets):
+    failures = []
+    client = module.app.test_client()
+    with module.app.app_context():
+        engine = module.db.engine
+    for path, budget in budgets:
+        with count_queries(engine) as statements:
+            response = client.get(path)
+            response.get_data()
+            response.close()
+        status = 'ok' if len(statements) <= budget and response.status_code == 200 else 'FAIL'
+        print(f"{status:4} {path:24} {len(statements):3} statements (budget {budget})")
+        if status != 'ok':
+            failures.append((path, statements))
+    return failures
+
+
+def main():
+    with tempfile.TemporaryDirectory() as scratch:
+        module = load_app('week_7', scratch)
+        populate(module, n_students=200, n_courses=20, per_student=5)
+        failures = check_budgets(module, BUDGETS)
+
+    for path, statements in failures:
+        print(f"\n{path}:", file=sys.stderr)
+        for statement in statements:
+            print(f"  {' '.join(statement.split())}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
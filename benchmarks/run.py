@@ -0,0 +1,258 @@
+"""Benchmark suite: every week's routes through the Flask test client and a real gunicorn server.
+
+Each week runs in a scratch copy against a synthetic dataset of the given
+size. For every route it records throughput, latency percentiles, peak RSS
+and SQL statements per request, and the whole run is written to JSON with
+the commit it was taken at, so runs can be compared across commits:
+
+    python benchmarks/run.py --students 10000 --out before.json
+    python benchmarks/run.py --students 10000 --out after.json --baseline before.json
+"""
+import argparse
+import datetime
+import http.client
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+from harness import ROOT, count_queries, load_app, percentile, populate, write_marks_csv
+from load_test import REQUESTS, free_port, wait_until_up
+
+
+WEEKS = ['week_3'] + sorted(REQUESTS)
+WEEK_3_CALLS = [('-s', 1001), ('-c', 2001)]
+FORM = {'Content-Type': 'application/x-www-form-urlencoded'}
+
+
+def label(method, path, body):
+    return f"{method} {path}" + (f" {body}" if body else "")
+
+
+def build_week(week, scratch, sizes):
+    students, courses, per_student = sizes
+    prepare = ((lambda workdir: write_marks_csv(os.path.join(workdir, 'data.csv'), students, courses, per_student))
+               if week in ('week_3', 'week_4') else None)
+    module = load_app(week, scratch, prepare=prepare)
+    if hasattr(module, 'db'):
+        populate(module, students, courses, per_student)
+    return module
+
+
+def summarize(route, latencies, elapsed, errors=0, statements=None):
+    return {
+        'route': route,
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3) if latencies else None,
+        'p90_ms': round(percentile(latencies, 90) * 1000, 3) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3) if latencies else None,
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 3) if latencies else None,
+        'queries_per_request': round(len(statements) / len(latencies), 2) if statements is not None and latencies else None,
+    }
+
+
+def repeat(call, duration):
+    latencies = []
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - started)
+    return latencies, time.perf_counter() - start
+
+
+def measure_client(week, sizes, duration):
+    """Runs in a fresh interpreter so peak RSS belongs to this week alone."""
+    with tempfile.TemporaryDirectory() as scratch:
+        module = build_week(week, scratch, sizes)
+        workdir = os.path.dirname(module.__file__)
+        routes = []
+
+        if week == 'week_3':
+            os.chdir(workdir)
+            for flag, value in WEEK_3_CALLS:
+                page = module.student_page if flag == '-s' else module.course_page
+                page(value)
+                latencies, elapsed = repeat(lambda: page(value), duration)
+                routes.append(summarize(f"{flag} {value}", latencies, elapsed))
+        else:
+            client = module.app.test_client()
+            engine = None
+            if hasattr(module, 'db'):
+                with module.app.app_context():
+                    engine = module.db.engine
+
+            for method, path, body in REQUESTS[week]:
+                errors = []
+
+                def call():
+                    response = client.open(path, method=method, data=body, headers=FORM if body else None)
+                    response.get_data()
+                    response.close()
+                    if response.status_code >= 500:
+                        errors.append(response.status_code)
+
+                call()
+                with count_queries(engine) if engine is not None else nullcontext() as statements:
+                    latencies, elapsed = repeat(call, duration)
+                routes.append(summarize(label(method, path, body), latencies, elapsed, len(errors), statements))
+
+    return {'week': week, 'mode': 'client', 'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            'routes': routes}
+
+
+def timed_client(args):
+    port, requests, duration = args
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    latencies = {label(*request): [] for request in requests}
+    errors = dict.fromkeys(latencies, 0)
+    deadline = time.monotonic() + duration
+    done = 0
+    while time.monotonic() < deadline:
+        method, path, body = requests[done % len(requests)]
+        route = label(method, path, body)
+        started = time.perf_counter()
+        try:
+            conn.request(method, path, body=body, headers=FORM)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 500:
+                errors[route] += 1
+        except (OSError, http.client.HTTPException):
+            errors[route] += 1
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port)
+        latencies[route].append(time.perf_counter() - started)
+        done += 1
+    return latencies, errors
+
+
+def peak_rss_mb(pid):
+    """High-water RSS of ``pid`` and its direct children, from /proc (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as children:
+            pids = [pid] + [int(child) for child in children.read().split()]
+        total = 0
+        for each in pids:
+            with open(f"/proc/{each}/status") as status:
+                total += next(int(line.split()[1]) for line in status if line.startswith('VmHWM:'))
+        return round(total / 1024, 1)
+    except (OSError, StopIteration):
+        return None
+
+
+def measure_server(week, workdir, args):
+    port = free_port()
+    env = dict(os.environ, WEB_BIND=f'127.0.0.1:{port}', WEB_WORKERS=str(args.workers), WEB_THREADS=str(args.threads))
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', os.path.join(ROOT, 'deploy', 'gunicorn.conf.py'),
+         '--chdir', workdir, 'app:create_app()'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_up(port)
+        with multiprocessing.Pool(args.clients) as pool:
+            results = pool.map(timed_client, [(port, REQUESTS[week], args.duration)] * args.clients)
+        rss = peak_rss_mb(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+
+    routes = []
+    for request in REQUESTS[week]:
+        route = label(*request)
+        latencies = [value for result in results for value in result[0][route]]
+        routes.append(summarize(route, latencies, args.duration, sum(result[1][route] for result in results)))
+    return {'week': week, 'mode': 'server', 'workers': args.workers, 'threads': args.threads,
+            'clients': args.clients, 'peak_rss_mb': rss, 'routes': routes}
+
+
+def git_state():
+    def git(*command):
+        return subprocess.run(['git', *command], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    return {'commit': git('rev-parse', 'HEAD') or None, 'dirty': bool(git('status', '--porcelain', '--untracked-files=no'))}
+
+
+def compare(baseline, results):
+    before = {(run['week'], run['mode'], route['route']): (run, route)
+              for run in baseline['results'] for route in run['routes']}
+    print(f"\ncompared with {baseline['meta'].get('commit') or 'baseline'}:")
+    for run in results:
+        for route in run['routes']:
+            old = before.get((run['week'], run['mode'], route['route']))
+            if old is None:
+                continue
+            old_run, old_route = old
+            change = (route['rps'] / old_route['rps'] - 1) * 100 if old_route['rps'] else 0.0
+            print(f"{run['week']:7} {run['mode']:6} {route['route']:40} "
+                  f"{old_route['rps'] or 0:9.1f} -> {route['rps'] or 0:9.1f} req/s ({change:+6.1f}%)  "
+                  f"p99 {old_route['p99_ms']} -> {route['p99_ms']} ms  "
+                  f"queries {old_route['queries_per_request']} -> {route['queries_per_request']}  "
+                  f"rss {old_run['peak_rss_mb']} -> {run['peak_rss_mb']} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--weeks', nargs='+', choices=WEEKS, default=WEEKS)
+    parser.add_argument('--modes', nargs='+', choices=['client', 'server'], default=['client', 'server'])
+    parser.add_argument('--students', type=int, default=10000)
+    parser.add_argument('--courses', type=int, default=200)
+    parser.add_argument('--per-student', type=int, default=5)
+    parser.add_argument('--duration', type=float, default=3, help="seconds per route (client) or per week (server)")
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--out', help="JSON results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument('--baseline', help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    sizes = (args.students, args.courses, args.per_student)
+    results = []
+    spawn = multiprocessing.get_context('spawn')
+    for week in args.weeks:
+        if 'client' in args.modes:
+            with ProcessPoolExecutor(1, mp_context=spawn) as pool:
+                results.append(pool.submit(measure_client, week, sizes, args.duration).result())
+        if 'server' in args.modes and week in REQUESTS:
+            with tempfile.TemporaryDirectory() as scratch:
+                module = build_week(week, scratch, sizes)
+                if hasattr(module, 'db'):
+                    with module.app.app_context():
+                        module.db.engine.dispose()
+                results.append(measure_server(week, os.path.dirname(module.__file__), args))
+
+        for run in results[-2:]:
+            if run['week'] != week:
+                continue
+            for route in run['routes']:
+                print(f"{week:7} {run['mode']:6} {route['route']:40} {route['rps'] or 0:9.1f} req/s  "
+                      f"p50 {route['p50_ms']} ms  p99 {route['p99_ms']} ms  "
+                      f"queries {route['queries_per_request']}  rss {run['peak_rss_mb']} MB")
+
+    meta = dict(git_state(), timestamp=datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+                python=platform.python_version(), platform=platform.platform(), cpu_count=os.cpu_count(),
+                args=vars(args))
+    out = args.out or os.path.join(ROOT, 'benchmarks', 'results', f"{(meta['commit'] or 'unknown')[:12]}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as output:
+        json.dump({'meta': meta, 'results': results}, output, indent=2)
+    print(f"results written to {out}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            compare(json.load(baseline), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Import-to-first-response time for the week_3 CLI and the week_4 Flask app.
+
+Each scenario runs in a fresh interpreter inside a scratch copy of the week
+directory, so output files and caches never touch the working tree.
+
+    python benchmarks/startup.py --repeat 5 --max-ms 400
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CLI_SNIPPET = """
+import runpy, sys, time
+start = time.perf_counter()
+sys.argv = ['app.py', {flag!r}, {value!r}]
+runpy.run_path('app.py', run_name='__main__')
+print(time.perf_counter() - start, *(module in sys.modules for module in {modules!r}))
+"""
+
+FLASK_SNIPPET = """
+import sys, time
+start = time.perf_counter()
+import app
+response = app.app.test_client().post('/', data={{'ID': {category!r}, 'id_value': {value!r}}})
+assert response.status_code == 200
+print(time.perf_counter() - start, *(module in sys.modules for module in {modules!r}))
+"""
+
+# Heavy modules whose import is reported per scenario.
+HEAVY_MODULES = ('matplotlib', 'numpy')
+# The student paths must not load these at all.
+LEAN_PATHS = {
+    'week_3 -s': ('matplotlib', 'numpy'),
+    'week_4 student': ('matplotlib',),
+}
+
+SCENARIOS = {
+    'week_3 -s': ('week_3', CLI_SNIPPET.format(flag='-s', value='1001', modules=HEAVY_MODULES)),
+    'week_3 -c': ('week_3', CLI_SNIPPET.format(flag='-c', value='2001', modules=HEAVY_MODULES)),
+    'week_4 student': ('week_4', FLASK_SNIPPET.format(category='student_id', value='1001', modules=HEAVY_MODULES)),
+    'week_4 course': ('week_4', FLASK_SNIPPET.format(category='course_id', value='2001', modules=HEAVY_MODULES)),
+}
+
+
+def run_once(workdir, snippet):
+    out = subprocess.run([sys.executable, '-c', snippet], cwd=workdir, check=True,
+                         capture_output=True, text=True).stdout.split()
+    flags = out[-len(HEAVY_MODULES):]
+    return float(out[-len(HEAVY_MODULES) - 1]), {module for module, flag in zip(HEAVY_MODULES, flags) if flag == 'True'}
+
+
+def run_scenario(week, snippet, repeat):
+    with tempfile.TemporaryDirectory() as scratch:
+        workdir = os.path.join(scratch, week)
+        shutil.copytree(os.path.join(ROOT, week), workdir,
+                        ignore=shutil.ignore_patterns('static', '*.marks', '__pycache__'))
+        shutil.copytree(os.path.join(ROOT, 'common'), os.path.join(scratch, 'common'),
+                        ignore=shutil.ignore_patterns('__pycache__'))
+        # The first run primes the data.csv sidecar and bytecode; only warm starts are timed.
+        run_once(workdir, snippet)
+        timings, loaded = [], set()
+        for _ in range(repeat):
+            elapsed, modules = run_once(workdir, snippet)
+            timings.append(elapsed * 1000)
+            loaded |= modules
+    return {
+        'median_ms': round(statistics.median(timings), 2),
+        'min_ms': round(min(timings), 2),
+        'loaded': sorted(loaded),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--max-ms', type=float, help="fail if a student path's median exceeds this")
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    results = {name: run_scenario(week, snippet, args.repeat) for name, (week, snippet) in SCENARIOS.items()}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, result in results.items():
+            print(f"{name:16} median {result['median_ms']:8.2f} ms  min {result['min_ms']:8.2f} ms"
+                  f"  loaded {', '.join(result['loaded']) or 'none of ' + ', '.join(HEAVY_MODULES)}")
+
+    failed = False
+    for name, forbidden in LEAN_PATHS.items():
+        for module in forbidden:
+            if module in results[name]['loaded']:
+                print(f"FAIL: {name} imported {module}", file=sys.stderr)
+                failed = True
+        if args.max_ms is not None and results[name]['median_ms'] > args.max_ms:
+            print(f"FAIL: {name} took {results[name]['median_ms']} ms (budget {args.max_ms} ms)", file=sys.stderr)
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
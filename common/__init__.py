@@ -0,0 +1 @@
+"""Code shared by the week apps, importable once the repository root is on sys.path."""
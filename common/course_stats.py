@@ -0,0 +1,95 @@
+"""Per-course mark statistics computed with NumPy in one grouped pass.
+
+Rows are sorted by (course, mark) once; every course is then a contiguous
+run that starts where the course id changes, so medians and percentiles are
+index arithmetic on that run, and sums, squared sums and grade-band counts
+are ``np.bincount`` over the run numbers.
+"""
+import numpy as np
+
+
+PERCENTILES = (10, 25, 50, 75, 90)
+# IITM grade bands, from the lowest mark that earns each grade.
+GRADE_BANDS = (('S', 90), ('A', 80), ('B', 70), ('C', 60), ('D', 50), ('E', 40), ('U', 0))
+
+
+class CourseStats:
+    __slots__ = ('count', 'mean', 'stddev', 'minimum', 'maximum', 'median', 'percentiles', 'grades')
+
+    def __init__(self, count, mean, stddev, minimum, maximum, percentiles, grades):
+        self.count = count
+        self.mean = mean
+        self.stddev = stddev
+        self.minimum = minimum
+        self.maximum = maximum
+        self.percentiles = percentiles
+        self.median = percentiles[50]
+        self.grades = grades
+
+
+def _as_int_array(column):
+    # array('i') columns and memoryviews over the mmap cache are both read without copying.
+    return np.frombuffer(column, dtype=np.intc) if not isinstance(column, np.ndarray) else column
+
+
+def grouped_statistics(course_ids, marks):
+    """A ``{course_id: CourseStats}`` for every course in the parallel ``course_ids``/``marks`` columns."""
+    course_ids = _as_int_array(course_ids)
+    marks = _as_int_array(marks)
+    if not len(marks):
+        return {}
+
+    # One sort of a packed (course, mark) int64 key is cheaper than a lexsort plus gathers.
+    # Marks are offset into 0..2**32 - 1 so the low half sorts in mark order.
+    packed = np.sort((course_ids.astype(np.int64) << 32) | (marks.astype(np.int64) + 2**31))
+    sorted_courses = packed >> 32
+    sorted_marks = ((packed & 0xFFFFFFFF) - 2**31).astype(np.float64)
+    starts = np.flatnonzero(np.r_[True, sorted_courses[1:] != sorted_courses[:-1]])
+    counts = np.diff(np.r_[starts, len(packed)])
+    keys = sorted_courses[starts]
+    group = np.repeat(np.arange(len(keys)), counts)
+
+    totals = np.bincount(group, weights=sorted_marks)
+    squares = np.bincount(group, weights=sorted_marks * sorted_marks)
+    means = totals / counts
+    stddevs = np.sqrt(np.maximum(squares / counts - means * means, 0))
+    minimums = sorted_marks[starts]
+    maximums = sorted_marks[starts + counts - 1]
+
+    # Linear interpolation between the two closest ranks, as np.percentile does by default.
+    percentiles = {}
+    for pct in PERCENTILES:
+        position = (counts - 1) * (pct / 100)
+        lower = np.floor(position).astype(np.intp)
+        upper = np.minimum(lower + 1, counts - 1)
+        fraction = position - lower
+        below, above = sorted_marks[starts + lower], sorted_marks[starts + upper]
+        percentiles[pct] = below + (above - below) * fraction
+
+    thresholds = np.array([low for _, low in reversed(GRADE_BANDS)])
+    band = np.minimum(len(GRADE_BANDS) - np.searchsorted(thresholds, sorted_marks, side='right'), len(GRADE_BANDS) - 1)
+    grades = np.bincount(group * len(GRADE_BANDS) + band,
+                         minlength=len(keys) * len(GRADE_BANDS)).reshape(len(keys), len(GRADE_BANDS))
+
+    names = [name for name, _ in GRADE_BANDS]
+    stats = {}
+    for i, c_id in enumerate(keys.tolist()):
+        stats[c_id] = CourseStats(
+            count=int(counts[i]),
+            mean=float(means[i]),
+            stddev=float(stddevs[i]),
+            minimum=int(minimums[i]),
+            maximum=int(maximums[i]),
+            percentiles={pct: float(values[i]) for pct, values in percentiles.items()},
+            grades=dict(zip(names, grades[i].tolist())),
+        )
+    return stats
+
+
+def course_statistics(store, c_id=None):
+    """CourseStats for one course of a MarksStore, or a dict of them for every course when ``c_id`` is None."""
+    if c_id is None:
+        return grouped_statistics(store.course_ids, store.marks)
+    rows = np.asarray(store.course_rows.rows(c_id), dtype=np.intp)
+    marks = _as_int_array(store.marks)[rows]
+    return grouped_statistics(np.zeros(len(marks), dtype=np.intc), marks).get(0)
@@ -0,0 +1,157 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from common.marks_store import BIN_EDGES
+
+
+SVG_WIDTH, SVG_HEIGHT, SVG_MARGIN = 400, 240, 40
+
+
+def new_figure():
+    # matplotlib is imported here rather than at module level so that only
+    # course pages pay for it; student lookups and server boot never load it.
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    # A private Figure on the Agg canvas keeps renders independent of pyplot's global state.
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def render_histogram(bins, path, fig=None):
+    """Draw ``bins`` to a PNG at ``path``, on ``fig`` (cleared first) when a caller reuses one."""
+    if fig is None:
+        fig = new_figure()
+    else:
+        fig.clear()
+    ax = fig.add_subplot()
+    # Precomputed per-course bin counts, drawn as if hist() had binned the raw marks.
+    ax.hist(BIN_EDGES[:-1], bins=BIN_EDGES, weights=bins)
+    ax.set_xlabel('Marks')
+    ax.set_ylabel('Frequency')
+
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    fig.savefig(tmp_path, format='png')
+    os.replace(tmp_path, path)
+
+
+class HistogramCache:
+    """Histogram PNGs on disk, one file per (course, data revision), evicted least recently used.
+
+    Worker processes that share ``directory`` each keep their own LRU and may
+    evict files the others still list, so a hit is only trusted while its
+    file exists; a missing one is drawn again.
+    """
+
+    def __init__(self, directory, max_entries=256):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        existing = [f for f in os.listdir(directory) if f.startswith('hist_') and f.endswith('.png')]
+        existing.sort(key=lambda f: os.path.getmtime(os.path.join(directory, f)))
+        for filename in existing:
+            self._entries[filename] = None
+        self._evict()
+
+    def get(self, c_id, revision, load_bins):
+        filename = f"hist_{c_id}_{revision}.png"
+        path = os.path.join(self.directory, filename)
+        with self._lock:
+            if filename in self._entries:
+                if os.path.exists(path):
+                    self._entries.move_to_end(filename)
+                    return filename
+                del self._entries[filename]
+
+        render_histogram(load_bins(c_id), path)
+
+        with self._lock:
+            self._entries[filename] = None
+            self._entries.move_to_end(filename)
+            self._evict()
+        return filename
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            filename, _ = self._entries.popitem(last=False)
+            try:
+                os.remove(os.path.join(self.directory, filename))
+            except FileNotFoundError:
+                pass
+
+
+def histogram_json(c_id, bins):
+    return json.dumps({'course_id': c_id, 'edges': BIN_EDGES, 'counts': list(bins)}, separators=(',', ':'))
+
+
+def histogram_svg(c_id, bins):
+    """The same chart as render_histogram, as a few hundred bytes of SVG built without matplotlib."""
+    counts = list(bins)
+    top = max(counts) or 1
+    plot_width, plot_height = SVG_WIDTH - 2 * SVG_MARGIN, SVG_HEIGHT - 2 * SVG_MARGIN
+    bar_width = plot_width / len(counts)
+    bottom = SVG_HEIGHT - SVG_MARGIN
+
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{SVG_WIDTH}" height="{SVG_HEIGHT}" '
+             f'viewBox="0 0 {SVG_WIDTH} {SVG_HEIGHT}" font-family="sans-serif" font-size="10" role="img">'
+             f'<title>Histogram of marks, course {c_id}</title>',
+             '<g fill="#1f77b4" stroke="#fff">']
+    for i, count in enumerate(counts):
+        if not count:
+            continue
+        height = plot_height * count / top
+        parts.append(f'<rect x="{SVG_MARGIN + i * bar_width:g}" y="{bottom - height:.1f}" '
+                     f'width="{bar_width:g}" height="{height:.1f}"><title>{count}</title></rect>')
+    parts.append('</g>')
+    parts.append(f'<path d="M{SVG_MARGIN} {SVG_MARGIN}V{bottom}H{SVG_WIDTH - SVG_MARGIN}" fill="none" stroke="#000"/>')
+    parts.append('<g text-anchor="middle">')
+    for i, edge in enumerate(BIN_EDGES):
+        parts.append(f'<text x="{SVG_MARGIN + i * bar_width:g}" y="{bottom + 12}">{edge}</text>')
+    parts.append(f'<text x="{SVG_WIDTH / 2:g}" y="{SVG_HEIGHT - 8}">Marks</text></g>')
+    parts.append(f'<g text-anchor="end"><text x="{SVG_MARGIN - 4}" y="{bottom}">0</text>'
+                 f'<text x="{SVG_MARGIN - 4}" y="{SVG_MARGIN + 4}">{top}</text></g>')
+    parts.append(f'<text transform="translate(12 {SVG_HEIGHT / 2:g}) rotate(-90)" text-anchor="middle">Frequency</text>')
+    parts.append('</svg>')
+    return ''.join(parts)
+
+
+CHART_RENDERERS = {
+    'json': ('application/json', histogram_json),
+    'svg': ('image/svg+xml', histogram_svg),
+}
+
+
+class ChartCache:
+    """Serialized JSON/SVG histograms per (course, data revision, format), evicted least recently used.
+
+    Keyed on the same revision as the store's per-course aggregates, so a
+    chart is rebuilt only after the course's data has changed.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, c_id, revision, chart_format, load_bins):
+        """``(body, content_type, etag)`` for one course's chart."""
+        key = (c_id, revision, chart_format)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+
+        content_type, render = CHART_RENDERERS[chart_format]
+        entry = (render(c_id, load_bins(c_id)).encode(), content_type, f"{c_id}-{revision}-{chart_format}")
+        with self._lock:
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
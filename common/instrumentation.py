@@ -0,0 +1,190 @@
+"""Opt-in request instrumentation: SQL, template and per-endpoint timings exposed at /metrics.
+
+Shared by the week_4 - week_7 apps and enabled by their create_app() when
+INSTRUMENTATION is set. Metrics are kept per process, so under a
+multi-worker server each worker reports its own. Streamed responses are
+recorded when closed, so their time includes rendering the body.
+"""
+import cProfile
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Response, before_render_template, g, has_request_context, request, template_rendered
+
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LOCAL_ADDRS = ('127.0.0.1', '::1', None)
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    def observe(self, endpoint, seconds, timings):
+        with self._lock:
+            buckets, total = self._histograms.get(endpoint, ([0] * len(BUCKETS), [0.0, 0]))
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    buckets[i] += 1
+            total[0] += seconds
+            total[1] += 1
+            self._histograms[endpoint] = (buckets, total)
+            for key, value in timings.items():
+                self._counters[(endpoint,) + key] = self._counters.get((endpoint,) + key, 0) + value
+
+    def render(self):
+        lines = [
+            "# HELP http_request_duration_seconds Request latency by endpoint.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        with self._lock:
+            for endpoint, (buckets, (total, count)) in sorted(self._histograms.items()):
+                for bound, value in zip(BUCKETS, buckets):
+                    lines.append(f'http_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{bound}"}} {value}')
+                lines.append(f'http_request_duration_seconds_bucket{{endpoint="{endpoint}",le="+Inf"}} {count}')
+                lines.append(f'http_request_duration_seconds_sum{{endpoint="{endpoint}"}} {total}')
+                lines.append(f'http_request_duration_seconds_count{{endpoint="{endpoint}"}} {count}')
+
+            for name, kind, help_text in (
+                ('sql_queries_total', 'counter', 'SQL statements executed.'),
+                ('sql_seconds_total', 'counter', 'Time spent executing SQL.'),
+                ('template_render_seconds_total', 'counter', 'Time spent rendering Jinja templates.'),
+                ('section_seconds_total', 'counter', 'Time spent in named code sections.'),
+            ):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for (endpoint, metric, section), value in sorted(self._counters.items()):
+                    if metric == name:
+                        labels = f'endpoint="{endpoint}"' + (f',section="{section}"' if section else '')
+                        lines.append(f"{name}{{{labels}}} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _timings():
+    if has_request_context():
+        return g.get('_timings')
+    return None
+
+
+def _add(metric, value, section=''):
+    timings = _timings()
+    if timings is not None:
+        timings[(metric, section)] = timings.get((metric, section), 0) + value
+
+
+@contextmanager
+def timed(section):
+    """Attribute the enclosed block's wall time to ``section`` on the current request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _add('section_seconds_total', time.perf_counter() - start, section)
+
+
+def _instrument_engine(engine):
+    # Imported here so week_4, which has no database, can use timed() without SQLAlchemy installed.
+    from sqlalchemy import event
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['_query_start'].pop()
+        _add('sql_queries_total', 1)
+        _add('sql_seconds_total', time.perf_counter() - started)
+
+
+def _instrument_templates(app):
+    def before_render(sender, template, context, **extra):
+        if has_request_context():
+            g.setdefault('_template_starts', []).append(time.perf_counter())
+
+    def rendered(sender, template, context, **extra):
+        starts = g.get('_template_starts') if has_request_context() else None
+        if starts:
+            _add('template_render_seconds_total', time.perf_counter() - starts.pop())
+
+    before_render_template.connect(before_render, app, weak=False)
+    template_rendered.connect(rendered, app, weak=False)
+
+
+class _Profiler:
+    def __init__(self, backend):
+        self.backend = backend
+        if backend == 'pyinstrument':
+            from pyinstrument import Profiler
+            self.profiler = Profiler()
+            self.profiler.start()
+        else:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def save(self, directory, endpoint):
+        os.makedirs(directory, exist_ok=True)
+        stem = os.path.join(directory, f"{endpoint}-{time.time_ns()}")
+        if self.backend == 'pyinstrument':
+            self.profiler.stop()
+            with open(f"{stem}.html", 'w', encoding="utf-8") as output:
+                output.write(self.profiler.output_html())
+        else:
+            self.profiler.disable()
+            self.profiler.dump_stats(f"{stem}.prof")
+
+
+def init_instrumentation(app, engine=None):
+    """Register request hooks, optional SQL hooks on ``engine`` and the /metrics route on ``app``.
+
+    PROFILE_SAMPLE_RATE (0-1) profiles that fraction of requests, and an
+    ``X-Profile: 1`` header profiles one request on demand. Profiles go to
+    PROFILE_DIR as cProfile .prof files, or as HTML when PROFILER is
+    'pyinstrument'.
+    """
+    metrics = Metrics()
+    app.extensions['metrics'] = metrics
+    app.config.setdefault('PROFILE_SAMPLE_RATE', 0.0)
+    app.config.setdefault('PROFILE_DIR', os.path.join(app.root_path, 'profiles'))
+    app.config.setdefault('PROFILER', 'cprofile')
+
+    if engine is not None:
+        _instrument_engine(engine)
+    _instrument_templates(app)
+
+    @app.before_request
+    def start_request():
+        g._timings = {}
+        g._request_start = time.perf_counter()
+        if request.headers.get('X-Profile') == '1' or random.random() < app.config['PROFILE_SAMPLE_RATE']:
+            g._profiler = _Profiler(app.config['PROFILER'])
+
+    def finish(endpoint, started, timings, profiler):
+        if profiler is not None:
+            profiler.save(app.config['PROFILE_DIR'], endpoint)
+        metrics.observe(endpoint, time.perf_counter() - started, timings)
+
+    @app.after_request
+    def finish_request(response):
+        if '_request_start' not in g:
+            return response
+        args = (request.endpoint or 'unmatched', g._request_start, g._timings, g.pop('_profiler', None))
+        if response.is_streamed:
+            # A streamed template renders, and signals template_rendered, only as the body is sent.
+            response.call_on_close(lambda: finish(*args))
+        else:
+            finish(*args)
+        return response
+
+    @app.route('/metrics')
+    def metrics_endpoint():
+        if request.remote_addr not in LOCAL_ADDRS:
+            return Response(status=404)
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+    return metrics
@@ -0,0 +1,366 @@
+import copy
+import mmap
+import os
+import re
+import struct
+from array import array
+from bisect import bisect_left
+
+
+CHUNK_SIZE = 1 << 20
+CACHE_SUFFIX = '.marks'
+CACHE_MAGIC = b'MARKS002'
+CACHE_HEADER = struct.Struct('=8s5q')
+BIN_WIDTH = 10
+N_BINS = 10
+BIN_EDGES = tuple(range(0, BIN_WIDTH * N_BINS + 1, BIN_WIDTH))
+COMPACT_MIN_ROWS = 4096
+
+
+class RowIndex:
+    """Row numbers grouped by key, as three flat int arrays instead of a dict of per-key lists.
+
+    ``keys`` is sorted and ``order[offsets[i]:offsets[i + 1]]`` are the rows of
+    ``keys[i]``, found by bisection. The arrays can be memoryviews over the
+    read-only mmap cache; rows appended later go to the small ``appended`` dict.
+    """
+
+    __slots__ = ('keys', 'offsets', 'order', 'appended')
+
+    def __init__(self, keys=None, offsets=None, order=None):
+        self.keys = array('i') if keys is None else keys
+        self.offsets = array('i', [0]) if offsets is None else offsets
+        self.order = array('i') if order is None else order
+        self.appended = {}
+
+    @classmethod
+    def build(cls, column):
+        index = cls()
+        order = sorted(range(len(column)), key=column.__getitem__)
+        index.order = array('i', order)
+        previous = None
+        for position, row in enumerate(order):
+            key = column[row]
+            if key != previous:
+                if previous is not None:
+                    index.offsets.append(position)
+                index.keys.append(key)
+                previous = key
+        if order:
+            index.offsets.append(len(order))
+        return index
+
+    def _position(self, key):
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return i
+        return None
+
+    def __contains__(self, key):
+        return key in self.appended or self._position(key) is not None
+
+    def __iter__(self):
+        yield from self.keys
+        for key in self.appended:
+            if self._position(key) is None:
+                yield key
+
+    def __len__(self):
+        return len(self.keys) + sum(1 for key in self.appended if self._position(key) is None)
+
+    def add(self, key, row):
+        self.appended.setdefault(key, array('i')).append(row)
+
+    def copy(self):
+        # The flat arrays are never modified, so only the appended rows need copying.
+        index = RowIndex(self.keys, self.offsets, self.order)
+        index.appended = {key: array('i', rows) for key, rows in self.appended.items()}
+        return index
+
+    def appended_rows(self):
+        return sum(len(rows) for rows in self.appended.values())
+
+    def rows(self, key):
+        i = self._position(key)
+        base = self.order[self.offsets[i]:self.offsets[i + 1]] if i is not None else ()
+        extra = self.appended.get(key)
+        return list(base) + list(extra) if extra else base
+
+
+class Record:
+    """A view of one row of a MarksStore, for templates."""
+
+    __slots__ = ('_store', '_row')
+
+    def __init__(self, store, row):
+        self._store = store
+        self._row = row
+
+    @property
+    def student_id(self):
+        return self._store.student_ids[self._row]
+
+    @property
+    def course_id(self):
+        return self._store.course_ids[self._row]
+
+    @property
+    def marks(self):
+        return self._store.marks[self._row]
+
+
+class MarksStore:
+    """Columnar marks table with student/course row indexes and per-course aggregates.
+
+    Aggregates (sum, count, max and histogram bin counts) are kept up to date
+    on every append, so course pages never rescan a course's marks.
+    """
+
+    def __init__(self, rows=()):
+        self.student_ids = array('i')
+        self.course_ids = array('i')
+        self.marks = array('i')
+        self.student_rows = RowIndex()
+        self.course_rows = RowIndex()
+        self.course_sum = {}
+        self.course_count = {}
+        self.course_max = {}
+        self.course_bins = {}
+        self.revision = 0
+        self.source = None
+        self._buffer = None
+        for s_id, c_id, mark in rows:
+            self.append(s_id, c_id, mark)
+
+    @classmethod
+    def from_columns(cls, student_ids, course_ids, marks):
+        store = cls()
+        store.student_ids = student_ids
+        store.course_ids = course_ids
+        store.marks = marks
+        store.student_rows = RowIndex.build(student_ids)
+        store.course_rows = RowIndex.build(course_ids)
+        for c_id, mark in zip(course_ids, marks):
+            store._aggregate(c_id, mark)
+        return store
+
+    def __len__(self):
+        return len(self.marks)
+
+    def append(self, s_id, c_id, mark):
+        self._make_writable()
+        row = len(self.marks)
+        self.student_ids.append(s_id)
+        self.course_ids.append(c_id)
+        self.marks.append(mark)
+        self.student_rows.add(s_id, row)
+        self.course_rows.add(c_id, row)
+        self._aggregate(c_id, mark)
+        self.revision += 1
+
+    def extended(self, rows):
+        """A new store with ``rows`` appended, leaving this one untouched for readers still holding it.
+
+        The columns are copied (a memcpy each) rather than grown in place, so
+        buffers exported from a published store, e.g. NumPy views, stay valid.
+        """
+        store = copy.copy(self)
+        store.student_ids = _copy_column(self.student_ids)
+        store.course_ids = _copy_column(self.course_ids)
+        store.marks = _copy_column(self.marks)
+        store._buffer = None
+        store.student_rows = self.student_rows.copy()
+        store.course_rows = self.course_rows.copy()
+        store.course_sum = dict(self.course_sum)
+        store.course_count = dict(self.course_count)
+        store.course_max = dict(self.course_max)
+        store.course_bins = {k: array('i', v) for k, v in self.course_bins.items()}
+        for s_id, c_id, mark in rows:
+            store.append(s_id, c_id, mark)
+
+        # Fold appended rows back into the flat arrays once they stop being a small overflow.
+        if store.student_rows.appended_rows() > max(COMPACT_MIN_ROWS, len(store.student_rows.order) // 8):
+            store.student_rows = RowIndex.build(store.student_ids)
+            store.course_rows = RowIndex.build(store.course_ids)
+        return store
+
+    def _aggregate(self, c_id, mark):
+        self.course_sum[c_id] = self.course_sum.get(c_id, 0) + mark
+        self.course_count[c_id] = self.course_count.get(c_id, 0) + 1
+        if c_id not in self.course_max or mark > self.course_max[c_id]:
+            self.course_max[c_id] = mark
+        bins = self.course_bins.get(c_id)
+        if bins is None:
+            bins = self.course_bins[c_id] = array('i', bytes(4 * N_BINS))
+        bins[min(max(mark, 0) // BIN_WIDTH, N_BINS - 1)] += 1
+
+    def _make_writable(self):
+        # Stores opened from the binary cache are backed by a read-only mmap;
+        # the row indexes stay on it, since appends only touch their ``appended`` dicts.
+        if self._buffer is None:
+            return
+        self.student_ids = _copy_column(self.student_ids)
+        self.course_ids = _copy_column(self.course_ids)
+        self.marks = _copy_column(self.marks)
+        self.course_bins = {k: array('i', v) for k, v in self.course_bins.items()}
+        self._buffer = None
+
+    def has_student(self, s_id):
+        return s_id in self.student_rows
+
+    def has_course(self, c_id):
+        return c_id in self.course_rows
+
+    def student_records(self, s_id):
+        return [Record(self, r) for r in self.student_rows.rows(s_id)]
+
+    def course_marks(self, c_id):
+        return [self.marks[r] for r in self.course_rows.rows(c_id)]
+
+    def course_average(self, c_id):
+        return self.course_sum[c_id] / self.course_count[c_id]
+
+    def course_histogram(self, c_id):
+        """Mark counts per BIN_EDGES bin; marks of 100 fall in the last bin."""
+        return self.course_bins[c_id]
+
+
+_ROW = rb'(?:[^,\n]*,[^,\n]*,[^,\n]*|[ \t\r]*)'
+_ROWS = re.compile(rb'(?:%s\n)*%s' % (_ROW, _ROW))
+
+
+def _copy_column(column):
+    copied = array('i')
+    copied.frombytes(memoryview(column).cast('B'))
+    return copied
+
+
+def parse_values(chunk):
+    """Flat student, course, mark values from complete CSV lines; blank lines are skipped.
+
+    Raises ValueError unless every other line has exactly three integer fields.
+    """
+    if not _ROWS.fullmatch(chunk):
+        raise ValueError("malformed row")
+    lines = [line for line in chunk.split(b'\n') if line.strip()]
+    # int() rejects empty fields, so a row cannot borrow values from the next one.
+    return array('i', map(int, b','.join(lines).split(b','))) if lines else array('i')
+
+
+def parse_csv(path, chunk_size=CHUNK_SIZE, end=None):
+    """Columns of every row in ``path``, or of those in its first ``end`` bytes."""
+    student_ids, course_ids, marks = array('i'), array('i'), array('i')
+    with open(path, 'rb') as data_file:
+        data_file.readline()
+        tail = b''
+        while True:
+            size = chunk_size if end is None else max(0, min(chunk_size, end - data_file.tell()))
+            block = data_file.read(size)
+            chunk = tail + block
+            if block:
+                cut = chunk.rfind(b'\n') + 1
+                chunk, tail = chunk[:cut], chunk[cut:]
+
+            try:
+                values = parse_values(chunk)
+            except ValueError:
+                raise ValueError(f"{path}: malformed row before byte {data_file.tell()}") from None
+            student_ids.extend(values[0::3])
+            course_ids.extend(values[1::3])
+            marks.extend(values[2::3])
+            if not block:
+                break
+    return student_ids, course_ids, marks
+
+
+def _grouped(index, column):
+    if index.appended:
+        index = RowIndex.build(column)
+    return index.keys, index.offsets, index.order
+
+
+def write_cache(cache_path, csv_stat, store):
+    s_keys, s_offsets, s_order = _grouped(store.student_rows, store.student_ids)
+    c_keys, c_offsets, c_order = _grouped(store.course_rows, store.course_ids)
+    c_sum = array('q', (store.course_sum[c] for c in c_keys))
+    c_max = array('i', (store.course_max[c] for c in c_keys))
+    c_bins = array('i')
+    for c in c_keys:
+        c_bins.extend(store.course_bins[c])
+
+    header = CACHE_HEADER.pack(CACHE_MAGIC, csv_stat.st_mtime_ns, csv_stat.st_size,
+                               len(store), len(s_keys), len(c_keys))
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as cache_file:
+        cache_file.write(header)
+        for section in (store.student_ids, store.course_ids, store.marks,
+                        s_keys, s_offsets, s_order, c_keys, c_offsets, c_order, c_max, c_bins, c_sum):
+            cache_file.write(memoryview(section).cast('B'))
+    os.replace(tmp_path, cache_path)
+
+
+def open_cache(cache_path, csv_stat):
+    try:
+        with open(cache_path, 'rb') as cache_file:
+            buffer = mmap.mmap(cache_file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(buffer) < CACHE_HEADER.size:
+        return None
+    magic, mtime_ns, size, n_rows, n_students, n_courses = CACHE_HEADER.unpack_from(buffer)
+    if magic != CACHE_MAGIC or mtime_ns != csv_stat.st_mtime_ns or size != csv_stat.st_size:
+        return None
+
+    view = memoryview(buffer)
+    pos = CACHE_HEADER.size
+
+    def take(count, code='i'):
+        nonlocal pos
+        end = pos + count * struct.calcsize(code)
+        section = view[pos:end].cast(code)
+        pos = end
+        return section
+
+    store = MarksStore()
+    store.student_ids, store.course_ids, store.marks = take(n_rows), take(n_rows), take(n_rows)
+    s_keys, s_offsets, s_order = take(n_students), take(n_students + 1), take(n_rows)
+    c_keys, c_offsets, c_order = take(n_courses), take(n_courses + 1), take(n_rows)
+    c_max, c_bins, c_sum = take(n_courses), take(n_courses * N_BINS), take(n_courses, 'q')
+
+    store.student_rows = RowIndex(s_keys, s_offsets, s_order)
+    store.course_rows = RowIndex(c_keys, c_offsets, c_order)
+    store.course_sum = dict(zip(c_keys, c_sum))
+    store.course_max = dict(zip(c_keys, c_max))
+    store.course_bins = {c_keys[i]: c_bins[i * N_BINS:(i + 1) * N_BINS] for i in range(n_courses)}
+    store.course_count = {c_keys[i]: c_offsets[i + 1] - c_offsets[i] for i in range(n_courses)}
+    store._buffer = buffer
+    return store
+
+
+def load_store(path, use_cache=True):
+    csv_stat = os.stat(path)
+    cache_path = path + CACHE_SUFFIX
+    store = open_cache(cache_path, csv_stat) if use_cache else None
+    if store is None:
+        store = MarksStore.from_columns(*parse_csv(path, end=csv_stat.st_size))
+        if use_cache:
+            try:
+                write_cache(cache_path, csv_stat, store)
+            except OSError:
+                pass
+
+    # Revisions start from the source file's mtime so they stay unique across restarts.
+    store.revision = csv_stat.st_mtime_ns
+    store.source = (csv_stat.st_ino, csv_stat.st_size, csv_stat.st_mtime_ns)
+    return store
+
+
+if __name__ == '__main__':
+    # Rebuild the binary sidecar, and with it the per-course aggregates, from the CSV:
+    #     python -m common.marks_store week_4/data.csv
+    import sys
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else 'data.csv'
+    store = MarksStore.from_columns(*parse_csv(csv_path))
+    write_cache(csv_path + CACHE_SUFFIX, os.stat(csv_path), store)
+    print(f"{csv_path}{CACHE_SUFFIX}: {len(store)} rows, {len(store.course_rows)} courses")
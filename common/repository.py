@@ -0,0 +1,121 @@
+"""Student/course/enrollment models and their hot lookups, shared by the week_5, week_6 and week_7 apps.
+
+The apps keep their own databases, whose enrollment tables predate this
+module and differ: week_5 and week_7 store ``enrollments(estudent_id,
+ecourse_id)``, week_6 ``enrollment(student_id, course_id)``. A layout maps
+the one model set onto either table unchanged; in Python the columns are
+always ``Enrollment.student_id`` and ``Enrollment.course_id``, with the old
+``estudent_id``/``ecourse_id`` names kept as synonyms.
+
+Lookups run prebuilt statements with bound parameters. A statement built
+once keeps its cache key memoized, so a lookup goes straight to the compiled
+cache instead of rebuilding a Query (or analysing a ``lambda_stmt``) per call.
+"""
+from sqlalchemy import bindparam, insert, select
+from sqlalchemy.orm import joinedload, synonym
+
+
+# Enrollment table layouts: (table, student id column, course id column).
+LEGACY_ENROLLMENTS = ("enrollments", "estudent_id", "ecourse_id")
+ENROLLMENTS = ("enrollment", "student_id", "course_id")
+
+
+def define_models(db, layout):
+    table, student_column, course_column = layout
+
+    class Student(db.Model):
+        __tablename__ = "student"
+        student_id = db.Column(db.Integer,primary_key=True,autoincrement=True)
+        roll_number = db.Column(db.String,unique=True,nullable=False)
+        first_name= db.Column(db.String,nullable=False)
+        last_name= db.Column(db.String)
+
+    class Enrollment(db.Model):
+        __tablename__ = table
+        enrollment_id=db.Column(db.Integer,primary_key=True,nullable=False)
+        student_id = db.Column(student_column,db.Integer,db.ForeignKey("student.student_id"),nullable=False)
+        course_id = db.Column(course_column,db.Integer,db.ForeignKey("course.course_id"),nullable=False)
+        estudent_id = synonym("student_id")
+        ecourse_id = synonym("course_id")
+        __table_args__ = (
+            db.UniqueConstraint(student_column, course_column, name=f"uq_{table}_student_course"),
+            db.Index(f"ix_{table}_course_student", course_column, student_column),
+        )
+
+    class Course(db.Model):
+        __tablename__ = "course"
+        course_id = db.Column(db.Integer,primary_key=True,autoincrement=True)
+        course_code = db.Column(db.String,unique=True,nullable=False)
+        course_name= db.Column(db.String,nullable=False)
+        course_description= db.Column(db.String)
+        # Deleting a course through the session also deletes its enrollment rows.
+        student=db.relationship(Student, secondary=Enrollment.__table__)
+        students=db.relationship(Student, secondary=Enrollment.__table__, order_by=Student.student_id, viewonly=True)
+
+    Student.courses = db.relationship(Course, secondary=Enrollment.__table__, order_by=Course.course_id, viewonly=True)
+    return Student, Course, Enrollment
+
+
+class Repository:
+    """One app's models plus the lookups its request handlers run most."""
+
+    def __init__(self, db, layout):
+        self.db = db
+        self.Student, self.Course, self.Enrollment = Student, Course, Enrollment = define_models(db, layout)
+
+        self._student = select(Student).where(Student.student_id == bindparam("student_id"))
+        self._student_with_courses = self._student.options(joinedload(Student.courses))
+        self._student_by_roll = select(Student).where(Student.roll_number == bindparam("roll_number"))
+        self._course = select(Course).where(Course.course_id == bindparam("course_id"))
+        self._course_by_code = select(Course).where(Course.course_code == bindparam("course_code"))
+        self._courses = select(Course)
+        self._enrollment = select(Enrollment).where(Enrollment.student_id == bindparam("student_id"),
+                                                    Enrollment.course_id == bindparam("course_id"))
+        self._enrollments = select(Enrollment).where(Enrollment.student_id == bindparam("student_id"))
+        self._course_ids_of = select(Enrollment.course_id).where(Enrollment.student_id == bindparam("student_id"))
+        self._courses_of = (select(Course).join(Enrollment, Enrollment.course_id == Course.course_id)
+                            .where(Enrollment.student_id == bindparam("student_id")))
+
+    def first(self, statement, **params):
+        """The first entity ``statement`` returns; apps pass their own prebuilt statements here too."""
+        # unique() merges the duplicate rows a joinedload collection produces.
+        return self.db.session.scalars(statement, params).unique().first()
+
+    def all(self, statement, **params):
+        return self.db.session.scalars(statement, params).unique().all()
+
+    def student(self, student_id):
+        return self.first(self._student, student_id=student_id)
+
+    def student_with_courses(self, student_id):
+        return self.first(self._student_with_courses, student_id=student_id)
+
+    def student_by_roll(self, roll_number):
+        return self.first(self._student_by_roll, roll_number=roll_number)
+
+    def course(self, course_id):
+        return self.first(self._course, course_id=course_id)
+
+    def course_by_code(self, course_code):
+        return self.first(self._course_by_code, course_code=course_code)
+
+    def courses(self):
+        return self.all(self._courses)
+
+    def enrollment(self, student_id, course_id):
+        return self.first(self._enrollment, student_id=student_id, course_id=course_id)
+
+    def enrollments(self, student_id):
+        return self.all(self._enrollments, student_id=student_id)
+
+    def course_ids_of(self, student_id):
+        return set(self.db.session.scalars(self._course_ids_of, {"student_id": student_id}))
+
+    def courses_of(self, student_id):
+        return self.all(self._courses_of, student_id=student_id)
+
+    def add_enrollments(self, student_id, course_ids):
+        # One executemany INSERT in the caller's transaction instead of a commit per course.
+        if course_ids:
+            self.db.session.execute(insert(self.Enrollment), [{"student_id": student_id, "course_id": course_id}
+                                                              for course_id in sorted(course_ids)])
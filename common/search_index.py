@@ -0,0 +1,79 @@
+"""SQLite FTS5 full-text search over students and courses.
+
+Each searchable table gets an external-content FTS5 index (``<table>_search``)
+that stores only the inverted index, kept in sync with the base table by
+triggers. Queries match every word as a prefix.
+
+bm25 has to visit every match to weigh a term, so results are ranked only when
+a query matches at most RANK_LIMIT rows; broader queries (a one- or two-letter
+prefix over a million names) come back in id order instead, which the index
+serves without scoring anything.
+"""
+import re
+
+from sqlalchemy import column, func, literal_column, select, table
+
+
+SEARCH_COLUMNS = {
+    'student': ('student_id', ('roll_number', 'first_name', 'last_name')),
+    'course': ('course_id', ('course_code', 'course_name', 'course_description')),
+}
+WORD = re.compile(r'\w+')
+RANK_LIMIT = 1000
+
+
+def search_ddl(name):
+    key, columns = SEARCH_COLUMNS[name]
+    index = f"{name}_search"
+    names = ", ".join(columns)
+    new = ", ".join(f"NEW.{c}" for c in columns)
+    old = ", ".join(f"OLD.{c}" for c in columns)
+    remove = f"INSERT INTO {index} ({index}, rowid, {names}) VALUES ('delete', OLD.{key}, {old});"
+    add = f"INSERT INTO {index} (rowid, {names}) VALUES (NEW.{key}, {new});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5({names}, content='{name}', content_rowid='{key}', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3 4 5 6')",
+        f"CREATE TRIGGER IF NOT EXISTS {index}_insert AFTER INSERT ON {name} BEGIN {add} END",
+        f"CREATE TRIGGER IF NOT EXISTS {index}_delete AFTER DELETE ON {name} BEGIN {remove} END",
+        f"CREATE TRIGGER IF NOT EXISTS {index}_update AFTER UPDATE ON {name} BEGIN {remove} {add} END",
+    ]
+
+
+def install_search(conn):
+    """Create the indexes and triggers if missing and rebuild the indexes from the base tables."""
+    for name in SEARCH_COLUMNS:
+        for statement in search_ddl(name):
+            conn.exec_driver_sql(statement)
+        conn.exec_driver_sql(f"INSERT INTO {name}_search ({name}_search) VALUES ('rebuild')")
+
+
+def match_expression(q):
+    # Quoting each word keeps FTS5 operators and punctuation in user input from being parsed.
+    # Single letters match whole words only: no prefix index covers them, and "a"* matches nearly everything.
+    words = WORD.findall(q or "")
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' if len(word) > 1 else f'"{word}"' for word in words)
+
+
+def search_statements(model, q, limit, offset=0):
+    """Statements for one page of ``model`` rows matching ``q``; None when ``q`` has no searchable words.
+
+    Returns ``(probe, ranked, unranked)``: run ``probe`` (a match count capped
+    at RANK_LIMIT + 1), then ``ranked`` if it is at most RANK_LIMIT, else ``unranked``.
+    """
+    expression = match_expression(q)
+    if expression is None:
+        return None
+    name = model.__tablename__
+    index = table(f"{name}_search", column("rowid"), column("rank"))
+    matches = select(index.c.rowid).where(literal_column(index.name).match(expression))
+    probe = select(func.count()).select_from(matches.limit(RANK_LIMIT + 1).subquery())
+
+    # Ordering and LIMIT run inside the FTS index, so only the page of hits is joined back.
+    key = getattr(model, SEARCH_COLUMNS[name][0])
+    statements = [probe]
+    for order in (index.c.rank, index.c.rowid):
+        hits = matches.add_columns(order.label("position")).order_by(order).limit(limit).offset(offset).subquery()
+        statements.append(select(model).join(hits, hits.c.rowid == key).order_by(hits.c.position))
+    return tuple(statements)
@@ -0,0 +1,60 @@
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool, StaticPool
+
+
+# WAL lets readers proceed during a write, and synchronous=NORMAL is durable
+# under WAL while avoiding an fsync per commit.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,
+}
+
+
+def engine_options(uri, pool_size=8, max_overflow=8, timeout=30):
+    if not uri.startswith("sqlite"):
+        return {"pool_size": pool_size, "max_overflow": max_overflow, "pool_timeout": timeout}
+    if uri in ("sqlite://", "sqlite:///:memory:"):
+        # An in-memory database only exists inside its one connection, so every thread shares it.
+        return {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+    # File databases get a bounded pool of per-thread connections; `timeout` is how long a
+    # writer waits on SQLite's lock before raising "database is locked".
+    return {
+        "poolclass": QueuePool,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": timeout,
+        "connect_args": {"check_same_thread": False, "timeout": timeout},
+    }
+
+
+def configure_sqlite(engine, pragmas=SQLITE_PRAGMAS):
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def init_database(app, db, *setups):
+    """Bind ``db`` to ``app`` on a tuned engine and run each ``setup(engine)`` once; returns the engine.
+
+    Sessions are scoped to the app context, so each request gets its own and
+    releases it on teardown.
+    """
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS",
+                          engine_options(app.config["SQLALCHEMY_DATABASE_URI"], pool_size=app.config["DB_POOL_SIZE"]))
+    db.init_app(app)
+    with app.app_context():
+        engine = db.engine
+        configure_sqlite(engine)
+        for setup in setups:
+            setup(engine)
+        # Release the connections setup opened, so workers forked from a preloaded app never share them.
+        engine.dispose()
+    return engine
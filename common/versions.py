@@ -0,0 +1,62 @@
+"""Version counters shared by every worker process through a memory-mapped file.
+
+Caches that live in one process (week_6's response cache, week_7's page
+cache) stamp each entry with the version of the data it was built from and
+serve it only while that version is current. A write in any worker bumps
+the version, so every other worker's copy stops matching at once.
+"""
+import mmap
+import os
+import struct
+import threading
+import zlib
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+VERSION = struct.Struct('=q')
+
+
+class VersionCounters:
+    """64-bit counters in a shared file, addressed by name.
+
+    A name maps to one of ``slots`` counters by crc32 (``hash()`` differs
+    between processes); names that share a slot only cost each other extra
+    cache misses.
+    """
+
+    def __init__(self, path, slots=4096):
+        self.path = path
+        self.slots = slots
+        size = VERSION.size * slots
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self._map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        self._lock = threading.Lock()
+
+    def _offset(self, name):
+        return zlib.crc32(name.encode()) % self.slots * VERSION.size
+
+    def get(self, *names):
+        return tuple(VERSION.unpack_from(self._map, self._offset(name))[0] for name in names)
+
+    def bump(self, *names):
+        self._bump({self._offset(name) for name in names})
+
+    def bump_all(self):
+        self._bump(range(0, self.slots * VERSION.size, VERSION.size))
+
+    def _bump(self, offsets):
+        # flock on a fresh descriptor, since forked workers share inherited ones.
+        with self._lock, open(self.path, 'rb') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            for offset in offsets:
+                VERSION.pack_into(self._map, offset, VERSION.unpack_from(self._map, offset)[0] + 1)
@@ -0,0 +1,33 @@
+"""Multi-process gunicorn profile shared by the week_4 - week_7 apps.
+
+Run from the repository root, pointing --chdir at the week to serve:
+
+    gunicorn -c deploy/gunicorn.conf.py --chdir week_7 "app:create_app()"
+    WEB_WORKERS=4 WEB_THREADS=8 gunicorn -c deploy/gunicorn.conf.py --chdir week_4 "app:create_app()"
+
+Each worker process builds its own app (and SQLAlchemy engine pool) from
+create_app(); threads share that worker's pool. SQLite allows one writer
+at a time, so write-heavy loads gain more from threads than from extra
+workers, while read-heavy loads scale with workers up to the core count.
+"""
+import multiprocessing
+import os
+
+
+bind = os.environ.get("WEB_BIND", "127.0.0.1:8000")
+workers = int(os.environ.get("WEB_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("WEB_THREADS", 4))
+worker_class = "gthread"
+
+# Import the app module once in the master so week_4's marks data is loaded
+# before fork and shared copy-on-write. create_app() disposes of the engine
+# after its schema checks, so no pooled SQLite handle is inherited by the
+# forked workers.
+preload_app = True
+
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+max_requests = int(os.environ.get("WEB_MAX_REQUESTS", 10000))
+max_requests_jitter = max_requests // 10
+accesslog = os.environ.get("WEB_ACCESS_LOG")
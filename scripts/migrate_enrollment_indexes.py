@@ -0,0 +1,67 @@
+"""Add the enrollment indexes and unique (student, course) constraint to existing databases.
+
+Duplicate (student, course) enrollments are collapsed onto the lowest
+enrollment_id first, since the unique index cannot be created over them.
+Safe to run more than once.
+
+    python scripts/migrate_enrollment_indexes.py                # all week_5-week_7 databases
+    python scripts/migrate_enrollment_indexes.py path/to/db.sqlite3
+"""
+import os
+import sqlite3
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DATABASES = [
+    os.path.join(ROOT, 'week_5', 'database.sqlite3'),
+    os.path.join(ROOT, 'week_6', 'api_database.sqlite3'),
+    os.path.join(ROOT, 'week_7', 'week7_database.sqlite3'),
+]
+ENROLLMENT_SCHEMAS = [
+    ('enrollments', 'estudent_id', 'ecourse_id'),
+    ('enrollments', 'student_id', 'course_id'),
+    ('enrollment', 'student_id', 'course_id'),
+]
+
+
+def enrollment_tables(conn):
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for table, student_col, course_col in ENROLLMENT_SCHEMAS:
+        if table in tables:
+            columns = {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+            if {student_col, course_col} <= columns:
+                yield table, student_col, course_col
+
+
+def migrate(path):
+    conn = sqlite3.connect(path)
+    try:
+        with conn:
+            for table, student_col, course_col in enrollment_tables(conn):
+                removed = conn.execute(f"""
+                    DELETE FROM "{table}" WHERE enrollment_id NOT IN (
+                        SELECT MIN(enrollment_id) FROM "{table}" GROUP BY {student_col}, {course_col}
+                    )""").rowcount
+                conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS "uq_{table}_student_course" '
+                             f'ON "{table}" ({student_col}, {course_col})')
+                conn.execute(f'CREATE INDEX IF NOT EXISTS "ix_{table}_course_student" '
+                             f'ON "{table}" ({course_col}, {student_col})')
+                print(f"{path}: indexed {table}, removed {removed} duplicate enrollments")
+        conn.execute("ANALYZE")
+        # journal_mode=WAL is persistent, so it is set once here rather than only on connect.
+        conn.execute("PRAGMA journal_mode=WAL")
+    finally:
+        conn.close()
+
+
+def main():
+    for path in sys.argv[1:] or DEFAULT_DATABASES:
+        if os.path.exists(path):
+            migrate(path)
+        else:
+            print(f"{path}: not found, skipped")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+"""The week_7 pages stay within the SQL statement budgets in benchmarks/query_budget.py.
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+from harness import count_queries, load_app, populate
+from query_budget import BUDGETS
+
+
+@pytest.fixture(scope='module')
+def week_7(tmp_path_factory):
+    module = load_app('week_7', str(tmp_path_factory.mktemp('scratch')))
+    populate(module, n_students=200, n_courses=20, per_student=5)
+    return module
+
+
+@pytest.mark.parametrize('path, budget', BUDGETS)
+def test_query_budget(week_7, path, budget):
+    with week_7.app.app_context():
+        engine = week_7.db.engine
+    with count_queries(engine) as statements:
+        response = week_7.app.test_client().get(path)
+        response.get_data()
+        response.close()
+    assert response.status_code == 200
+    assert len(statements) <= budget, '\n'.join(' '.join(statement.split()) for statement in statements)
@@ -1,17 +1,16 @@
+import argparse
+import os
 import sys
-import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
 from jinja2 import Template
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.histograms import render_histogram
+from common.marks_store import load_store
 
 
-data = []
-with open('data.csv', 'r', encoding="utf-8") as data_file:
-    data_file.readline()
-    for i in data_file.readlines():
-        data.append(list(map(int, i.strip('\n').split(','))))
+data = load_store('data.csv')
 
-
-def error_page():
-    err_page = """
+ERROR_HTML = """
         <!DOCTYPE html>
         <html lang="en">
         <head>
@@ -24,15 +23,7 @@ def error_page():
         </body>
         </html>"""
 
-    with open('output.html', 'w', encoding="utf-8") as err_output:
-        err_output.write(err_page)
-
-def student_page(s_id):
-    if s_id not in [i[0] for i in data]:
-        error_page()
-        return
-
-    student = """<!DOCTYPE html>
+STUDENT_TEMPLATE = Template("""<!DOCTYPE html>
         <html lang="en">
         <head>
             <meta charset="UTF-8">
@@ -48,9 +39,9 @@ def student_page(s_id):
                 </tr>
                 {% for i in s_data %}
                 <tr>
-                    <td>{{ i[0] }}</td>
-                    <td>{{ i[1] }}</td>
-                    <td>{{ i[2] }}</td>
+                    <td>{{ i.student_id }}</td>
+                    <td>{{ i.course_id }}</td>
+                    <td>{{ i.marks }}</td>
                 </tr>
                 {% endfor %}
                 <tr>
@@ -59,24 +50,9 @@ def student_page(s_id):
                 </tr>
             </table>
         </body>
-        </html>"""
-
-    s_data = []
-    tot_marks = 0
-    for s in data:
-        if s[0] == s_id:
-            s_data.append(s)
-            tot_marks += s[2]
-
-    with open('output.html', 'w', encoding="utf-8") as st_output:
-        st_output.write(Template(student).render(s_data=s_data, tot_marks=tot_marks))
-
-def course_page(c_id):
-    if c_id not in[i[1] for i in data]:
-        error_page()
-        return
+        </html>""")
 
-    course = """<!DOCTYPE html>
+COURSE_TEMPLATE = Template("""<!DOCTYPE html>
         <html lang="en">
         <head>
             <meta charset="UTF-8">
@@ -88,33 +64,135 @@ def course_page(c_id):
                 <tr>
                     <th>Average Marks</th>
                     <th>Maximum Marks</th>
+                    <th>Median Marks</th>
+                    <th>Standard Deviation</th>
                 </tr>
                 <tr>
                     <td>{{ avg_marks }}</td>
                     <td>{{ max_marks }}</td>
+                    <td>{{ stats.median }}</td>
+                    <td>{{ "%.2f"|format(stats.stddev) }}</td>
+                </tr>
+            </table>
+            <table border=1>
+                <tr>
+                    {% for pct in stats.percentiles %}
+                    <th>{{ pct }}th Percentile</th>
+                    {% endfor %}
+                </tr>
+                <tr>
+                    {% for value in stats.percentiles.values() %}
+                    <td>{{ "%.2f"|format(value) }}</td>
+                    {% endfor %}
                 </tr>
             </table>
-            <img src="hist_of_marks.png" alt="histogram of marks">
+            <table border=1>
+                <tr>
+                    {% for grade in stats.grades %}
+                    <th>{{ grade }}</th>
+                    {% endfor %}
+                </tr>
+                <tr>
+                    {% for count in stats.grades.values() %}
+                    <td>{{ count }}</td>
+                    {% endfor %}
+                </tr>
+            </table>
+            <img src="{{ hist_file }}" alt="histogram of marks">
         </body>
-        </html>"""
+        </html>""")
 
-    c_marks = []
-    for c in data:
-        if c_id == c[1]:
-            c_marks.append(c[2])
 
-    plt.hist(c_marks)
-    plt.xlabel('Marks')
-    plt.ylabel('Frequency')
-    plt.savefig('hist_of_marks.png')
+def error_page():
+    with open('output.html', 'w', encoding="utf-8") as err_output:
+        err_output.write(ERROR_HTML)
+
+def write_student(s_id, out_path):
+    s_data = data.student_records(s_id)
+    tot_marks = sum(s.marks for s in s_data)
+
+    with open(out_path, 'w', encoding="utf-8") as st_output:
+        st_output.write(STUDENT_TEMPLATE.render(s_data=s_data, tot_marks=tot_marks))
+
+def write_course(c_id, out_path, hist_path):
+    # NumPy is only needed for course reports, so student lookups never load it.
+    from common.course_stats import course_statistics
+    render_histogram(data.course_histogram(c_id), hist_path)
+    stats = course_statistics(data, c_id)
+
+    with open(out_path, 'w', encoding="utf-8") as c_output:
+        c_output.write(COURSE_TEMPLATE.render(avg_marks=stats.mean, max_marks=stats.maximum, stats=stats,
+                                              hist_file=os.path.basename(hist_path)))
+
+def student_page(s_id):
+    if not data.has_student(s_id):
+        error_page()
+        return
+
+    write_student(s_id, 'output.html')
+
+def course_page(c_id):
+    if not data.has_course(c_id):
+        error_page()
+        return
+
+    write_course(c_id, 'output.html', 'hist_of_marks.png')
+
+def student_report(s_id, out_dir):
+    if not data.has_student(s_id):
+        return None
+    out_path = os.path.join(out_dir, f'student_{s_id}.html')
+    write_student(s_id, out_path)
+    return out_path
+
+def course_report(c_id, out_dir):
+    if not data.has_course(c_id):
+        return None
+    out_path = os.path.join(out_dir, f'course_{c_id}.html')
+    write_course(c_id, out_path, os.path.join(out_dir, f'hist_{c_id}.png'))
+    return out_path
+
+def batch_reports(flag, ids, out_dir, workers=1):
+    if flag == '-s':
+        report, known = student_report, data.student_rows
+    else:
+        report, known = course_report, data.course_rows
+    if 'all' in ids:
+        ids = sorted(known)
+    else:
+        ids = [int(i) for i in ids]
 
-    with open('output.html', 'w', encoding="utf-8") as c_output:
-        c_output.write(Template(course).render(avg_marks=sum(c_marks)/len(c_marks), max_marks=max(c_marks)))
+    os.makedirs(out_dir, exist_ok=True)
+    out_dirs = [out_dir] * len(ids)
+    if workers > 1:
+        # Forked workers inherit the loaded marks store, so nothing is re-read per report.
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunksize = max(1, len(ids) // (workers * 4))
+            written = list(pool.map(report, ids, out_dirs, chunksize=chunksize))
+    else:
+        written = list(map(report, ids, out_dirs))
+
+    for i, path in zip(ids, written):
+        if path is None:
+            print(f"skipped unknown ID {i}", file=sys.stderr)
+    return [path for path in written if path is not None]
+
+def batch_main(flag, argv):
+    parser = argparse.ArgumentParser(prog=f'app.py {flag}', description="Render one report per ID.")
+    parser.add_argument('ids', nargs='+', help="IDs to render, or 'all'")
+    parser.add_argument('--out', default='reports', help="output directory (default: reports)")
+    parser.add_argument('--workers', type=int, default=1, help="render across this many processes")
+    args = parser.parse_args(argv)
+
+    written = batch_reports(flag, args.ids, args.out, args.workers)
+    print(f"wrote {len(written)} reports to {args.out}")
 
 if __name__ == '__main__':
-    if sys.argv[1] == '-s':
+    if len(sys.argv) < 3 or sys.argv[1] not in ('-s', '-c'):
+        error_page()
+    elif len(sys.argv) > 3 or sys.argv[2] == 'all':
+        batch_main(sys.argv[1], sys.argv[2:])
+    elif sys.argv[1] == '-s':
         student_page(int(sys.argv[2]))
-    elif sys.argv[1] == '-c':
-        course_page(int(sys.argv[2]))
     else:
-        error_page()
\ No newline at end of file
+        course_page(int(sys.argv[2]))
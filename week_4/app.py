@@ -1,51 +1,93 @@
 import os
-from flask import Flask, render_template, request
-import matplotlib.pyplot as plt
-
-app = Flask(__name__)
-
-data = []
-with open('data.csv', 'r', encoding="utf-8") as data_file:
-    data_file.readline()
-    for i in data_file.readlines():
-        data.append(list(map(int, i.strip('\n').split(','))))
+import sys
+from flask import Blueprint, Flask, Response, abort, current_app, render_template, request, send_from_directory, url_for
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.instrumentation import init_instrumentation, timed
+from common.course_stats import course_statistics
+from common.histograms import CHART_RENDERERS, ChartCache, HistogramCache
+from dataset_watcher import DatasetWatcher
+from precompute import Manifest
+
+current_dir = os.path.abspath(os.path.dirname(__file__))
+bp = Blueprint('main', __name__)
+
+# Loaded at import so a preloading WSGI server shares one copy across forked workers.
+# Request handlers read dataset.store once, so each sees a single snapshot while appends swap in new ones.
+dataset = DatasetWatcher('data.csv', float(os.environ.get('DATA_RELOAD_INTERVAL', 2)))
+hist_cache = HistogramCache(os.path.join(current_dir, 'static', 'hist'))
+chart_cache = ChartCache()
+# Written by precompute.py; pages are rendered live whenever it is missing or out of date.
+precomputed = Manifest()
+
+def create_app():
+    app = Flask(__name__)
+    app.config['INSTRUMENTATION'] = bool(os.environ.get('INSTRUMENTATION'))
+    app.config['DATA_RELOAD_INTERVAL'] = dataset.interval
+    # 'svg' links course pages to /course/<id>/histogram; 'png' keeps the matplotlib image.
+    app.config['HISTOGRAM_FORMAT'] = os.environ.get('HISTOGRAM_FORMAT', 'svg')
+    app.register_blueprint(bp)
+    if app.config['DATA_RELOAD_INTERVAL']:
+        app.before_request(dataset.start)
+    if app.config['INSTRUMENTATION']:
+        init_instrumentation(app)
+    return app
 
 def error_page():
     return render_template("error.html")
 
 def student_page(s_id):
-    if s_id not in [i[0] for i in data]:
+    data = dataset.store
+    if not data.has_student(s_id):
         return error_page()
 
-    s_data = []
-    tot_marks = 0
-    for s in data:
-        if s[0] == s_id:
-            s_data.append(s)
-            tot_marks += s[2]
+    manifest = precomputed.current(data.source)
+    if manifest is not None:
+        return send_from_directory(*precomputed.student_page(manifest, s_id))
+
+    s_data = data.student_records(s_id)
+    tot_marks = sum(s.marks for s in s_data)
 
     return render_template("student.html", s_data=s_data, tot_marks=tot_marks)
 
 def course_page(c_id):
-    if c_id not in[i[1] for i in data]:
+    data = dataset.store
+    if not data.has_course(c_id):
         return error_page()
 
-    c_marks = []
-    for c in data:
-        if c_id == c[1]:
-            c_marks.append(c[2])
-
-    path = "./static"
-    if not os.path.exists(path):
-        os.mkdir(path)
-    plt.hist(c_marks)
-    plt.xlabel('Marks')
-    plt.ylabel('Frequency')
-    plt.savefig('./static/hist_of_marks.png')
-
-    return render_template("course.html", avg_marks=sum(c_marks)/len(c_marks), max_marks=max(c_marks))
-
-@app.route('/', methods=["GET", "POST"])
+    if current_app.config['HISTOGRAM_FORMAT'] == 'png':
+        hist_url = url_for('static', filename=histogram_png(data, c_id))
+    else:
+        hist_url = url_for('main.course_histogram', c_id=c_id, format='svg')
+
+    stats = course_statistics(data, c_id)
+    return render_template("course.html", avg_marks=stats.mean, max_marks=stats.maximum, stats=stats,
+                           hist_url=hist_url)
+
+def histogram_png(data, c_id):
+    manifest = precomputed.current(data.source)
+    if manifest is not None:
+        return precomputed.histogram(manifest, c_id)
+    with timed('histogram'):
+        return f"hist/{hist_cache.get(c_id, data.revision, data.course_histogram)}"
+
+@bp.route('/course/<int:c_id>/histogram')
+def course_histogram(c_id):
+    data = dataset.store
+    if not data.has_course(c_id):
+        abort(404)
+
+    chart_format = request.args.get('format', 'json')
+    if chart_format == 'png':
+        return send_from_directory(os.path.join(current_dir, 'static'), histogram_png(data, c_id))
+    if chart_format not in CHART_RENDERERS:
+        abort(400)
+
+    body, content_type, etag = chart_cache.get(c_id, data.revision, chart_format, data.course_histogram)
+    response = Response(body, content_type=content_type, headers={'Cache-Control': 'no-cache'})
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+@bp.route('/', methods=["GET", "POST"])
 def main():
     if request.method == "GET":
         return render_template('index.html')
@@ -70,5 +112,7 @@ def main():
 
     return error_page()
 
+app = create_app()
+
 if __name__ == '__main__':
     app.run()
\ No newline at end of file
@@ -0,0 +1,76 @@
+import os
+import threading
+import time
+
+from common.marks_store import load_store, parse_values
+
+
+class DatasetWatcher:
+    """Keeps a MarksStore in step with a CSV file that is appended to while the app runs.
+
+    ``poll`` compares the file's inode, size and mtime with those the current
+    store was built from. Rows appended since are parsed from the old end
+    offset and folded into a new store with ``MarksStore.extended``; anything
+    else (the file replaced, truncated or rewritten in place) triggers a full
+    reload. Either way the new store replaces ``store`` in one assignment, so a
+    request that reads ``store`` once sees one consistent snapshot throughout.
+    """
+
+    def __init__(self, path, interval=2.0):
+        self.path = path
+        self.interval = interval
+        self.store = load_store(path)
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def poll(self):
+        """Pick up changes to the file; returns the number of rows appended, or None after a full reload."""
+        with self._lock:
+            store = self.store
+            inode, size, mtime_ns = store.source
+            stat = os.stat(self.path)
+            if (stat.st_ino, stat.st_size, stat.st_mtime_ns) == store.source:
+                return 0
+            if stat.st_ino != inode or stat.st_size <= size:
+                return self._reload()
+
+            with open(self.path, 'rb') as data_file:
+                data_file.seek(size - 1)
+                last = data_file.read(1)
+                tail = data_file.read(stat.st_size - size)
+            if last != b'\n' and not tail.lstrip(b'\r').startswith(b'\n'):
+                # The file had no trailing newline and the append continued its last row.
+                return self._reload()
+
+            # A row still being written stays in the file for the next poll.
+            cut = tail.rfind(b'\n') + 1
+            if not cut:
+                return 0
+            try:
+                values = parse_values(tail[:cut])
+            except ValueError:
+                return self._reload()
+
+            new_store = store.extended(zip(values[0::3], values[1::3], values[2::3]))
+            new_store.source = (stat.st_ino, size + cut, stat.st_mtime_ns)
+            self.store = new_store
+            return len(values) // 3
+
+    def _reload(self):
+        self.store = load_store(self.path)
+        return None
+
+    def start(self):
+        # Threads do not survive fork, so each gunicorn worker starts its own on first use.
+        if not self.interval or self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        threading.Thread(target=self._run, name='dataset-watcher', daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.poll()
+            except (OSError, ValueError):
+                pass
@@ -0,0 +1,184 @@
+"""Render every course histogram and student page ahead of time.
+
+    python precompute.py [data.csv] --workers 1 2 4
+
+Histograms are drawn across a ProcessPoolExecutor whose workers each reuse
+one Agg figure, and student pages are rendered from templates/student.html
+in the same pool. Output goes to a new static/precomputed/<revision>-<run>/
+and the manifest.json next to it, which app.py serves from for as long as its data
+still matches the file the manifest was built from. With several worker
+counts the run is repeated for each and the rates compared; the last run's
+output is kept.
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.histograms import new_figure, render_histogram
+from common.marks_store import load_store
+
+current_dir = os.path.abspath(os.path.dirname(__file__))
+PRECOMPUTED_DIR = os.path.join(current_dir, 'static', 'precomputed')
+MANIFEST_NAME = 'manifest.json'
+RUN_DIRECTORY = re.compile(r'\d+-\d+')
+
+Row = namedtuple('Row', 'student_id course_id marks')
+
+_figure = None
+_student_template = None
+
+
+class Manifest:
+    """The latest manifest.json, re-read whenever precompute replaces it."""
+
+    def __init__(self, directory=PRECOMPUTED_DIR):
+        self.directory = directory
+        self.path = os.path.join(directory, MANIFEST_NAME)
+        self._loaded = (None, None)
+        self._lock = threading.Lock()
+
+    def current(self, source):
+        """The manifest if it was built from the data.csv state ``source`` (a store's ``source``), else None."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        key = (stat.st_ino, stat.st_mtime_ns)
+        loaded_key, manifest = self._loaded
+        if loaded_key != key:
+            with self._lock:
+                with open(self.path, encoding="utf-8") as manifest_file:
+                    manifest = json.load(manifest_file)
+                self._loaded = (key, manifest)
+        if tuple(manifest['source']) != source:
+            return None
+        return manifest
+
+    def histogram(self, manifest, c_id):
+        """The static/ path of a course's precomputed histogram."""
+        return f"precomputed/{manifest['directory']}/hist_{c_id}.png"
+
+    def student_page(self, manifest, s_id):
+        return os.path.join(self.directory, manifest['directory'], 'students'), f"{s_id}.html"
+
+
+def _init_worker():
+    global _figure, _student_template
+    _figure = new_figure()
+    # Flask renders .html templates with autoescaping on; select_autoescape does the same.
+    env = Environment(loader=FileSystemLoader(os.path.join(current_dir, 'templates')), autoescape=select_autoescape())
+    _student_template = env.get_template('student.html')
+
+
+def render_histograms(jobs):
+    for bins, path in jobs:
+        render_histogram(bins, path, _figure)
+    return len(jobs)
+
+
+def render_students(jobs):
+    for rows, path in jobs:
+        s_data = [Row(*row) for row in rows]
+        with open(path, 'w', encoding="utf-8") as st_output:
+            st_output.write(_student_template.render(s_data=s_data, tot_marks=sum(s.marks for s in s_data)))
+    return len(jobs)
+
+
+def _ready(_):
+    # Held long enough that every worker takes one, so all have run _init_worker before timing starts.
+    time.sleep(0.1)
+
+
+def _chunks(jobs, workers):
+    size = max(1, len(jobs) // (workers * 4))
+    return [jobs[i:i + size] for i in range(0, len(jobs), size)]
+
+
+def _timed_map(pool, render, jobs, workers):
+    start = time.perf_counter()
+    done = sum(pool.map(render, _chunks(jobs, workers)))
+    elapsed = time.perf_counter() - start
+    return done, elapsed
+
+
+def _previous_directory(manifest_path):
+    try:
+        with open(manifest_path, encoding="utf-8") as manifest_file:
+            directory = json.load(manifest_file).get('directory')
+    except (OSError, ValueError, AttributeError):
+        return None
+    # Run directories are named <revision>-<run>, so anything else was not written here.
+    return directory if isinstance(directory, str) and RUN_DIRECTORY.fullmatch(directory) else None
+
+
+def precompute(csv_path, workers, out_dir=PRECOMPUTED_DIR):
+    store = load_store(csv_path)
+    # A fresh directory per run: a rerun on unchanged data must not touch the one the live manifest serves.
+    directory = f"{store.revision}-{time.time_ns()}"
+    target = os.path.join(out_dir, directory)
+    os.makedirs(os.path.join(target, 'students'))
+
+    # Workers get each course's bin counts and each student's rows, so nothing is re-read from the CSV.
+    hist_jobs = [(list(store.course_histogram(c_id)), os.path.join(target, f'hist_{c_id}.png'))
+                 for c_id in store.course_rows]
+    columns = (store.student_ids, store.course_ids, store.marks)
+    student_jobs = [([tuple(column[r] for column in columns) for r in store.student_rows.rows(s_id)],
+                     os.path.join(target, 'students', f'{s_id}.html'))
+                    for s_id in store.student_rows]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        list(pool.map(_ready, range(workers)))
+        images, hist_seconds = _timed_map(pool, render_histograms, hist_jobs, workers)
+        pages, page_seconds = _timed_map(pool, render_students, student_jobs, workers)
+
+    manifest = {
+        'revision': store.revision,
+        'source': store.source,
+        'directory': directory,
+        'rows': len(store),
+        'histograms': images,
+        'student_pages': pages,
+        'workers': workers,
+        'images_per_second': round(images / hist_seconds, 1) if hist_seconds else None,
+        'pages_per_second': round(pages / page_seconds, 1) if page_seconds else None,
+    }
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    previous = _previous_directory(manifest_path)
+    tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+    # The superseded run is unreachable once the manifest has moved on. Only
+    # the directory the old manifest names is removed; out_dir may hold anything else.
+    if previous is not None and previous != directory:
+        shutil.rmtree(os.path.join(out_dir, previous), ignore_errors=True)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute week_4 histograms and student pages.")
+    parser.add_argument('csv_path', nargs='?', default='data.csv')
+    parser.add_argument('--workers', type=int, nargs='+', default=[os.cpu_count() or 1],
+                        help="worker processes; several values compare the rates")
+    parser.add_argument('--out', default=PRECOMPUTED_DIR, help="output directory (default: static/precomputed)")
+    args = parser.parse_args()
+
+    for workers in args.workers:
+        manifest = precompute(args.csv_path, workers, args.out)
+        print(f"{workers:3} workers: {manifest['histograms']} histograms at {manifest['images_per_second']} images/s, "
+              f"{manifest['student_pages']} student pages at {manifest['pages_per_second']} pages/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,44 +1,38 @@
 import os
-from flask import Flask, render_template, request, redirect, url_for
+import sys
+from flask import Blueprint, Flask, render_template, request, redirect, url_for
 from flask_sqlalchemy import SQLAlchemy
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.instrumentation import init_instrumentation
+from common.sqlite_config import init_database
+from common.repository import LEGACY_ENROLLMENTS, Repository
 
-app = Flask(__name__)
 current_dir = os.path.abspath(os.path.dirname(__file__))
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(current_dir, 'database.sqlite3')}"
 db = SQLAlchemy()
-db.init_app(app)
-app.app_context().push()
-
-class Student(db.Model):
-    __tablename__ = "student"
-    student_id = db.Column(db.Integer,primary_key=True,autoincrement=True)
-    roll_number = db.Column(db.String,unique=True,nullable=False)
-    first_name= db.Column(db.String,nullable=False)
-    last_name= db.Column(db.String)
-
-class Course(db.Model):
-    __tablename__ = "course"
-    course_id = db.Column(db.Integer,primary_key=True,autoincrement=True)
-    course_code = db.Column(db.String,unique=True,nullable=False)
-    course_name= db.Column(db.String,nullable=False)
-    course_description= db.Column(db.String)
-    student=db.relationship("Student", secondary="enrollments")
-
-class Enrollments(db.Model):
-    __tablename__ = "enrollments"
-    enrollment_id=db.Column(db.Integer,primary_key=True,nullable=False)
-    estudent_id = db.Column(db.Integer,db.ForeignKey("student.student_id"),nullable=False)
-    ecourse_id = db.Column(db.Integer,db.ForeignKey("course.course_id"),nullable=False)
-
-
-@app.route('/')
+repo = Repository(db, LEGACY_ENROLLMENTS)
+Student, Course, Enrollment = repo.Student, repo.Course, repo.Enrollment
+bp = Blueprint('main', __name__)
+
+def create_app(config=None):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(current_dir, 'database.sqlite3')}"
+    app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 8))
+    app.config['INSTRUMENTATION'] = bool(os.environ.get('INSTRUMENTATION'))
+    app.config.update(config or {})
+    engine = init_database(app, db)
+    if app.config['INSTRUMENTATION']:
+        init_instrumentation(app, engine)
+    app.register_blueprint(bp)
+    return app
+
+@bp.route('/')
 def home():
     students = Student.query.all()
     return render_template('index.html', students=students, len=len(students))
 
-@app.route('/student/create', methods=['GET', 'POST'])
+@bp.route('/student/create', methods=['GET', 'POST'])
 def add_student():
-    courses = Course.query.all()
+    courses = repo.courses()
     if request.method == 'GET':
         return render_template('add_student.html', courses=courses)
     elif request.method == 'POST':
@@ -47,62 +41,60 @@ def add_student():
         l_name = request.form.get('l_name')
         enrolled_courses = request.form.getlist('courses')
 
-        existing_student = Student.query.filter(Student.roll_number == roll_number).first()
+        existing_student = repo.student_by_roll(roll_number)
         if existing_student:
             return render_template('already_exists.html')
 
         new_student = Student(roll_number=roll_number, first_name=f_name, last_name=l_name)
         db.session.add(new_student)
+        db.session.flush()
+        repo.add_enrollments(new_student.student_id, {int(c) for c in enrolled_courses})
         db.session.commit()
 
-        for enrolled_course in enrolled_courses:
-            course_id = enrolled_course
-            new_enrollment = Enrollments(estudent_id=new_student.student_id, ecourse_id=course_id)
-            db.session.add(new_enrollment)
-            db.session.commit()
-
         return redirect('/')
 
-@app.route('/student/<int:student_id>/update', methods=['GET', 'POST'])
+@bp.route('/student/<int:student_id>/update', methods=['GET', 'POST'])
 def update_student(student_id):
-    student = Student.query.filter(Student.student_id == student_id).first()
-    courses = Course.query.all()
+    student = repo.student(student_id)
+    courses = repo.courses()
     if request.method == 'GET':
         return render_template('update_student.html', student=student, courses=courses)
     elif request.method == 'POST':
         student.first_name = request.form.get('f_name')
         student.last_name = request.form.get('l_name')
 
-        updated_enrollment = request.form.getlist('courses')
-        Enrollments.query.filter(Enrollments.estudent_id == student_id).delete()
+        updated_enrollment = {int(c) for c in request.form.getlist('courses')}
+        current_enrollment = repo.course_ids_of(student_id)
 
-        for enrolled_course in updated_enrollment:
-            course_id = enrolled_course
-            new_enrollment = Enrollments(estudent_id=student.student_id, ecourse_id=course_id)
-            db.session.add(new_enrollment)
+        withdrawn = current_enrollment - updated_enrollment
+        if withdrawn:
+            Enrollment.query.filter(Enrollment.student_id == student_id, Enrollment.course_id.in_(withdrawn)).delete(synchronize_session=False)
+        repo.add_enrollments(student_id, updated_enrollment - current_enrollment)
 
         db.session.commit()
 
         return redirect('/')
 
-@app.route('/student/<int:student_id>/delete')
+@bp.route('/student/<int:student_id>/delete')
 def delete_student(student_id):
-    student = Student.query.filter(Student.student_id == student_id).first()
+    student = repo.student(student_id)
 
     if student:
-        Enrollments.query.filter(Enrollments.estudent_id == student.student_id).delete()
+        Enrollment.query.filter(Enrollment.student_id == student.student_id).delete()
 
         db.session.delete(student)
         db.session.commit()
 
     return redirect('/')
 
-@app.route('/student/<int:student_id>')
+@bp.route('/student/<int:student_id>')
 def get_student_detail(student_id):
-    student = Student.query.filter(Student.student_id == student_id).first()
-    enrolled_courses = Course.query.join(Enrollments).filter(Enrollments.estudent_id == student_id).all()
+    student = repo.student(student_id)
+    enrolled_courses = repo.courses_of(student_id)
     return render_template('student_detail.html', student=student, enrolled_courses=enrolled_courses)
 
 
+app = create_app()
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
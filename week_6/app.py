@@ -1,42 +1,70 @@
 import os
+import sys
 import json
-from flask import Flask, abort, make_response, request
+import click
+from flask import Flask, Response, abort, current_app, make_response, request, stream_with_context, url_for
+from flask.cli import with_appcontext
 from flask_sqlalchemy import SQLAlchemy
-from flask_restful import Resource, Api, fields, marshal_with
+from flask_restful import Resource, Api, fields, marshal, marshal_with
+from sqlalchemy import delete, event, insert, inspect, select
+from sqlalchemy.exc import IntegrityError
 from werkzeug.exceptions import HTTPException
+from werkzeug.local import LocalProxy
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.instrumentation import init_instrumentation
+from common.sqlite_config import init_database
+from common.repository import ENROLLMENTS, Repository
+from common.search_index import RANK_LIMIT, install_search, search_statements
+from response_cache import cached_get, make_cache
 
 
 # App and DB Initialization
-app = Flask(__name__)
-api = Api(app)
 current_dir = os.path.abspath(os.path.dirname(__file__))
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(current_dir, 'api_database.sqlite3')}"
 db = SQLAlchemy()
-db.init_app(app)
-app.app_context().push()
+api = Api()
+response_cache = LocalProxy(lambda: current_app.extensions["response_cache"])
+
+def create_app(config=None):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(current_dir, 'api_database.sqlite3')}"
+    app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 8))
+    app.config['INSTRUMENTATION'] = bool(os.environ.get('INSTRUMENTATION'))
+    app.config['RESPONSE_CACHE'] = os.environ.get('RESPONSE_CACHE', 'local')
+    app.config['RESPONSE_CACHE_URL'] = os.environ.get('RESPONSE_CACHE_URL')
+    app.config['RESPONSE_CACHE_VERSIONS'] = os.path.join(current_dir, 'api_database.sqlite3.versions')
+    app.config.update(config or {})
+    engine = init_database(app, db, upgrade_schema)
+    if app.config['INSTRUMENTATION']:
+        init_instrumentation(app, engine)
+    app.extensions["response_cache"] = make_cache(app.config)
+    api.init_app(app)
+    app.cli.add_command(rebuild_search_index)
+    return app
+
+
+def upgrade_schema(engine):
+    schema = inspect(engine)
+    if schema.has_table('student') and not schema.has_table('student_search'):
+        with engine.begin() as conn:
+            install_search(conn)
 
 
 # DB Models
-class Student(db.Model):
-    __tablename__ = "student"
-    student_id = db.Column(db.Integer,primary_key=True,autoincrement=True)
-    roll_number = db.Column(db.String,unique=True,nullable=False)
-    first_name= db.Column(db.String,nullable=False)
-    last_name= db.Column(db.String)
-
-class Course(db.Model):
-    __tablename__ = "course"
-    course_id = db.Column(db.Integer,primary_key=True,autoincrement=True)
-    course_code = db.Column(db.String,unique=True,nullable=False)
-    course_name= db.Column(db.String,nullable=False)
-    course_description= db.Column(db.String)
-    student=db.relationship("Student", secondary="enrollment")
-
-class Enrollment(db.Model):
-    __tablename__ = "enrollment"
-    enrollment_id=db.Column(db.Integer,primary_key=True,nullable=False)
-    student_id = db.Column(db.Integer,db.ForeignKey("student.student_id"),nullable=False)
-    course_id = db.Column(db.Integer,db.ForeignKey("course.course_id"),nullable=False)
+repo = Repository(db, ENROLLMENTS)
+Student, Course, Enrollment = repo.Student, repo.Course, repo.Enrollment
+
+# create_all, and create_app on a database from before search, install the FTS indexes and triggers.
+@event.listens_for(db.metadata, "after_create")
+def search_after_create(target, connection, **kw):
+    install_search(connection)
+
+@click.command("rebuild-search-index")
+@with_appcontext
+def rebuild_search_index():
+    """Rebuild the student and course full-text indexes from their tables."""
+    with db.engine.begin() as conn:
+        install_search(conn)
+    click.echo("search indexes rebuilt")
 
 # Response Marshal Format
 student_response = {
@@ -61,6 +89,10 @@ enroll_response = {
 
 # Request parser
 # args = reqparse.RequestParser()
+
+BULK_CHUNK_SIZE = 1000
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
     
 # Custom Error Handling
 class ResourceValidationError(HTTPException):
@@ -69,11 +101,180 @@ class ResourceValidationError(HTTPException):
         self.response = make_response(json.dumps(message), status_code)
 
 
+def commit_or_conflict(message):
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        abort(409, message)
+
+
+# Bulk Import/Export Helpers
+def read_bulk_items():
+    if request.mimetype == "application/x-ndjson":
+        items = []
+        for line in request.stream:
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                items.append(None)
+        return items
+
+    items = request.get_json(silent=True)
+    if not isinstance(items, list):
+        raise ResourceValidationError(400, "BULK001", "Expected a JSON array or an NDJSON stream")
+    return items
+
+def is_text(value):
+    return isinstance(value, str) and len(value) != 0
+
+def is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def item_error(index, status_code, error_code, error_message):
+    return {"index": index, "status_code": status_code, "error_code": error_code, "error_message": error_message}
+
+def existing_values(column, values):
+    found = set()
+    values = list(values)
+    for i in range(0, len(values), BULK_CHUNK_SIZE):
+        found.update(db.session.scalars(select(column).where(column.in_(values[i:i + BULK_CHUNK_SIZE]))))
+    return found
+
+def drop_duplicates(rows, column, message, errors):
+    # One IN query per chunk replaces a SELECT per item; repeats inside the batch are rejected too.
+    taken = existing_values(column, {row[column.key] for _, row in rows})
+    unique_rows = []
+    for index, row in rows:
+        if row[column.key] in taken:
+            errors.append(item_error(index, 409, None, message))
+        else:
+            taken.add(row[column.key])
+            unique_rows.append((index, row))
+    return unique_rows
+
+def insert_in_chunks(model, rows, recheck, errors):
+    """Insert ``rows`` one committed chunk at a time and return the rows inserted.
+
+    A chunk that violates a constraint, because a concurrent request wrote the
+    same key after the pre-check, is rolled back and passed through
+    ``recheck(chunk, errors)`` again, which reports the conflicting items; the
+    rest of the chunk is retried.
+    """
+    inserted = []
+    for i in range(0, len(rows), BULK_CHUNK_SIZE):
+        chunk = rows[i:i + BULK_CHUNK_SIZE]
+        while chunk:
+            try:
+                db.session.execute(insert(model), [row for _, row in chunk])
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                rechecked = recheck(chunk, errors)
+                if len(rechecked) == len(chunk):
+                    # The recheck finds nothing to drop, so retrying could loop; report the chunk instead.
+                    errors.extend(item_error(index, 409, "BULK003", "Conflicts with a concurrent write")
+                                  for index, _ in chunk)
+                    break
+                chunk = rechecked
+            else:
+                inserted.extend(chunk)
+                break
+    return inserted
+
+def check_enrollments(candidates, errors):
+    """The ``(index, student_id, course_id)`` candidates that can be inserted, as bulk rows; the rest go to ``errors``."""
+    students = existing_values(Student.student_id, {student_id for _, student_id, _ in candidates})
+    courses = existing_values(Course.course_id, {course_id for _, _, course_id in candidates})
+    enrolled = set()
+    student_list = list(students)
+    for i in range(0, len(student_list), BULK_CHUNK_SIZE):
+        enrolled.update(db.session.execute(
+            select(Enrollment.student_id, Enrollment.course_id)
+            .where(Enrollment.student_id.in_(student_list[i:i + BULK_CHUNK_SIZE]))
+        ).tuples())
+
+    rows = []
+    for index, student_id, course_id in candidates:
+        if student_id not in students:
+            errors.append(item_error(index, 400, "ENROLLMENT002", "Student does not exist."))
+        elif course_id not in courses:
+            errors.append(item_error(index, 400, "ENROLLMENT001", "Course does not exist."))
+        elif (student_id, course_id) in enrolled:
+            errors.append(item_error(index, 409, "ENROLLMENT004", "Student is already enrolled in the course."))
+        else:
+            enrolled.add((student_id, course_id))
+            rows.append((index, {"student_id": student_id, "course_id": course_id}))
+    return rows
+
+def recheck_enrollments(rows, errors):
+    return check_enrollments([(index, row["student_id"], row["course_id"]) for index, row in rows], errors)
+
+def bulk_response(created, errors):
+    errors.sort(key=lambda error: error["index"])
+    if not errors:
+        status_code = 201
+    elif created:
+        status_code = 207
+    else:
+        status_code = 400
+    return {"created": created, "errors": errors}, status_code
+
+def export_ndjson(model, response_format, order_by):
+    def generate():
+        rows = db.session.scalars(select(model).order_by(order_by).execution_options(yield_per=BULK_CHUNK_SIZE))
+        for row in rows:
+            yield json.dumps(marshal(row, response_format)) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+# Search Helpers
+def search_params(args):
+    q = args.get("q", "")
+    page = max(1, args.get("page", 1, type=int))
+    size = max(1, min(args.get("size", SEARCH_PAGE_SIZE, type=int), SEARCH_MAX_PAGE_SIZE))
+    return q, page, size
+
+def search_response(model, response_format):
+    q, page, size = search_params(request.args)
+    statements = search_statements(model, q, size + 1, (page - 1) * size)
+    if statements is None:
+        raise ResourceValidationError(400, "SEARCH001", "Search query q is required")
+
+    # One extra row tells whether there is a next page without counting every match.
+    probe, ranked, unranked = statements
+    rows = db.session.scalars(ranked if db.session.scalar(probe) <= RANK_LIMIT else unranked).all()
+    headers = {}
+    if len(rows) > size:
+        headers["Link"] = f'<{url_for(request.endpoint, q=q, page=page + 1, size=size)}>; rel="next"'
+    return marshal(rows[:size], response_format), 200, headers
+
+
+# Response Cache Keys
+def student_key(student_id):
+    return f"student:{student_id}"
+
+def course_key(course_id):
+    return f"course:{course_id}"
+
+def enrollment_key(student_id):
+    return f"enrollment:{student_id}"
+
+
 # API Resource Implementation
 class Students(Resource):
+    def get(self, student_id=None):
+        if student_id is None:
+            return search_response(Student, student_response)
+        return self.get_student(student_id=student_id)
+
+    @cached_get(response_cache, student_key)
     @marshal_with(student_response)
-    def get(self, student_id):
-        student = Student.query.filter(Student.student_id == student_id).first()
+    def get_student(self, student_id):
+        student = repo.student(student_id)
         if student is None:
             abort(404, "Student not found")
             
@@ -86,32 +287,30 @@ class Students(Resource):
         first_name = args.get("first_name")
         last_name = args.get("last_name")
 
-        student = student = Student.query.filter(Student.roll_number == roll_number).first()
-        
         if roll_number is None or len(roll_number)==0:
             raise ResourceValidationError(400, "STUDENT001", "Roll Number required")
         if first_name is None  or len(first_name)==0:
             raise ResourceValidationError(400, "STUDENT002", "First Name is required")
-        if student:
-            abort(409, "Student already exist")
 
+        # The unique roll_number constraint detects duplicates, so no SELECT is needed beforehand.
         new_student = Student(roll_number=roll_number, first_name=first_name, last_name=last_name)
         db.session.add(new_student)
-        db.session.commit()
+        commit_or_conflict("Student already exist")
         return new_student, 201
             
     def delete(self, student_id):
-        student = student = Student.query.filter(Student.student_id == student_id).first()
+        student = repo.student(student_id)
         if not student:
             abort(404, "Student not found")
 
         db.session.delete(student)
         db.session.commit()
+        response_cache.delete(student_key(student_id), enrollment_key(student_id))
         return "Successfully Deleted", 200
     
     @marshal_with(student_response)
     def put(self, student_id):
-        student = student = Student.query.filter(Student.student_id == student_id).first()
+        student = repo.student(student_id)
         args = request.json
         roll_number = args.get("roll_number")
         first_name = args.get("first_name")
@@ -127,14 +326,21 @@ class Students(Resource):
         student.roll_number = roll_number
         student.first_name = first_name
         student.last_name = last_name
-        db.session.commit()
+        commit_or_conflict("Student already exist")
+        response_cache.delete(student_key(student_id))
         return student, 200
             
             
 class Courses(Resource):
+    def get(self, course_id=None):
+        if course_id is None:
+            return search_response(Course, course_response)
+        return self.get_course(course_id=course_id)
+
+    @cached_get(response_cache, course_key)
     @marshal_with(course_response)
-    def get(self, course_id):
-        course = Course.query.filter(Course.course_id == course_id).first()
+    def get_course(self, course_id):
+        course = repo.course(course_id)
         if course: return course, 200
         else: abort(404, "Course not found")
     
@@ -145,32 +351,32 @@ class Courses(Resource):
         course_name = args.get("course_name")
         course_description = args.get("course_description")
         
-        course_exists = Course.query.filter(Course.course_code == course_code).first()
         if course_code is None or len(course_code)==0:
             raise ResourceValidationError(400, "COURSE002", "Course Code is required")
         if course_name is None  or len(course_name)==0:
             raise ResourceValidationError(400, "COURSE001", "Course Name is required")
-        if course_exists:
-            abort(409, "course_code already exist")
 
         new_course = Course(course_code=course_code, course_name=course_name, course_description=course_description)
         db.session.add(new_course)
-        db.session.commit()
+        commit_or_conflict("course_code already exist")
         return new_course, 201
     
     def delete(self, course_id):
-        course = Course.query.filter(Course.course_id == course_id).first()
+        course = repo.course(course_id)
         if not course:
             abort(404, "Course not found")
-            
+
+        # Deleting the course deletes its enrollment rows too, so those students' enrollment lists go stale.
+        student_ids = db.session.scalars(select(Enrollment.student_id).where(Enrollment.course_id == course_id)).all()
         db.session.delete(course)
         db.session.commit()
+        response_cache.delete(course_key(course_id), *(enrollment_key(student_id) for student_id in student_ids))
 
         return "Successfully Deleted", 200
     
     @marshal_with(course_response)
     def put(self, course_id):
-        course = Course.query.filter(Course.course_id == course_id).first()
+        course = repo.course(course_id)
         args = request.json
         course_code = args.get("course_code")
         course_name = args.get("course_name")
@@ -186,16 +392,18 @@ class Courses(Resource):
             course.course_code = course_code
             course.course_name = course_name
             course.course_description = course_description
-            db.session.commit()
+            commit_or_conflict("course_code already exist")
+            response_cache.delete(course_key(course_id))
             
         return course, 200
 
     
 class EnrollmentList(Resource):
+    @cached_get(response_cache, enrollment_key)
     @marshal_with(enroll_response)
     def get(self, student_id):
-        student = student = Student.query.filter(Student.student_id == student_id).first()
-        enrollments = Enrollment.query.filter(Enrollment.student_id == student_id).all()
+        student = repo.student(student_id)
+        enrollments = repo.enrollments(student_id)
         if not student:
             raise ResourceValidationError(400, "ENROLLMENT002", "Student does not exist.")
         if len(enrollments) == 0:
@@ -216,56 +424,163 @@ class EnrollmentList(Resource):
         args = request.json
         course_id = args.get("course_id")
 
-        student = student = Student.query.filter(Student.student_id == student_id).first()
-        if not student:
+        # One round trip: the student's current enrollments plus whether the course exists.
+        course_exists = select(Course.course_id).where(Course.course_id == course_id).exists()
+        rows = db.session.execute(
+            select(Enrollment.enrollment_id, Enrollment.course_id, course_exists.label("course_exists"))
+            .select_from(Student)
+            .outerjoin(Enrollment, Enrollment.student_id == Student.student_id)
+            .where(Student.student_id == student_id)
+            .order_by(Enrollment.enrollment_id)
+        ).all()
+        if not rows:
             raise ResourceValidationError(400, "ENROLLMENT002", "Student does not exist.")
-
-        course = Course.query.filter(Course.course_id == course_id).first()
-        if not course:
+        if not rows[0].course_exists:
             raise ResourceValidationError(400, "ENROLLMENT001", "Course does not exist.")
 
-        enrollment = Enrollment.query.filter(Enrollment.student_id == student_id, Enrollment.course_id == course_id).first()
-        if enrollment:
+        enrollments = [(row.enrollment_id, row.course_id) for row in rows if row.enrollment_id is not None]
+        if any(enrolled_course == course_id for _, enrolled_course in enrollments):
             raise ResourceValidationError(409, "ENROLLMENT004", "Student is already enrolled in the course.")
 
-        new_enrollment = Enrollment(student_id=student_id, course_id=course_id)
-        db.session.add(new_enrollment)
-        db.session.commit()
+        try:
+            enrollment_id = db.session.execute(
+                insert(Enrollment).values(student_id=student_id, course_id=course_id).returning(Enrollment.enrollment_id)
+            ).scalar_one()
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            raise ResourceValidationError(409, "ENROLLMENT004", "Student is already enrolled in the course.")
+        response_cache.delete(enrollment_key(student_id))
 
-        enrollments = Enrollment.query.filter(Enrollment.student_id == student_id).all()
+        enrollments.append((enrollment_id, course_id))
         response_data = [
             {
-                    "enrollment_id": enrollment.enrollment_id,
-                    "student_id": enrollment.student_id,
-                    "course_id": enrollment.course_id
+                    "enrollment_id": enrollment_id,
+                    "student_id": student_id,
+                    "course_id": enrolled_course
             }
-            for enrollment in enrollments
+            for enrollment_id, enrolled_course in enrollments
         ]
 
         return response_data, 201
     
     def delete(self, student_id, course_id):
-        student = student = Student.query.filter(Student.student_id == student_id).first()
-        course = Course.query.filter(Course.course_id == course_id).first()
-        enrollment = Enrollment.query.filter(Enrollment.student_id == student_id, Enrollment.course_id == course_id).first()
-        
-        if not student:
+        deleted = db.session.execute(
+            delete(Enrollment)
+            .where(Enrollment.student_id == student_id, Enrollment.course_id == course_id)
+            .returning(Enrollment.enrollment_id)
+        ).first()
+        db.session.commit()
+        if deleted:
+            response_cache.delete(enrollment_key(student_id))
+            return "Successfully Deleted", 200
+
+        # Nothing was deleted: a single lookup decides which error to report.
+        student_exists = select(Student.student_id).where(Student.student_id == student_id).exists()
+        course_exists = select(Course.course_id).where(Course.course_id == course_id).exists()
+        found = db.session.execute(select(student_exists.label("student"), course_exists.label("course"))).one()
+        if not found.student:
             raise ResourceValidationError(400, "ENROLLMENT002", "Student does not exist")
-        if not course:
+        if not found.course:
             raise ResourceValidationError(400, "ENROLLMENT001", "Course does not exist")
-        if not enrollment:
-            abort(404, "Enrollment for the student not found")
+        abort(404, "Enrollment for the student not found")
+        
 
-        db.session.delete(enrollment)
-        db.session.commit()
-        return "Successfully Deleted", 200
+class StudentBulk(Resource):
+    def get(self):
+        return export_ndjson(Student, student_response, Student.student_id)
+
+    def post(self):
+        errors, rows = [], []
+        for index, item in enumerate(read_bulk_items()):
+            if not isinstance(item, dict):
+                errors.append(item_error(index, 400, "BULK002", "Item must be a JSON object"))
+                continue
+            roll_number = item.get("roll_number")
+            first_name = item.get("first_name")
+
+            last_name = item.get("last_name")
+
+            # Types are checked per item so one malformed value cannot fail the batch at the IN query.
+            if not is_text(roll_number):
+                errors.append(item_error(index, 400, "STUDENT001", "Roll Number required"))
+            elif not is_text(first_name):
+                errors.append(item_error(index, 400, "STUDENT002", "First Name is required"))
+            elif last_name is not None and not isinstance(last_name, str):
+                errors.append(item_error(index, 400, "BULK002", "last_name must be a string"))
+            else:
+                rows.append((index, {"roll_number": roll_number, "first_name": first_name, "last_name": last_name}))
+
+        def unique_rolls(rows, errors):
+            return drop_duplicates(rows, Student.roll_number, "Student already exist", errors)
+
+        rows = insert_in_chunks(Student, unique_rolls(rows, errors), unique_rolls, errors)
+        return bulk_response(len(rows), errors)
+
+
+class CourseBulk(Resource):
+    def get(self):
+        return export_ndjson(Course, course_response, Course.course_id)
+
+    def post(self):
+        errors, rows = [], []
+        for index, item in enumerate(read_bulk_items()):
+            if not isinstance(item, dict):
+                errors.append(item_error(index, 400, "BULK002", "Item must be a JSON object"))
+                continue
+            course_code = item.get("course_code")
+            course_name = item.get("course_name")
+
+            course_description = item.get("course_description")
+
+            if not is_text(course_code):
+                errors.append(item_error(index, 400, "COURSE002", "Course Code is required"))
+            elif not is_text(course_name):
+                errors.append(item_error(index, 400, "COURSE001", "Course Name is required"))
+            elif course_description is not None and not isinstance(course_description, str):
+                errors.append(item_error(index, 400, "BULK002", "course_description must be a string"))
+            else:
+                rows.append((index, {"course_code": course_code, "course_name": course_name,
+                                     "course_description": course_description}))
+
+        def unique_codes(rows, errors):
+            return drop_duplicates(rows, Course.course_code, "course_code already exist", errors)
+
+        rows = insert_in_chunks(Course, unique_codes(rows, errors), unique_codes, errors)
+        return bulk_response(len(rows), errors)
+
+
+class EnrollmentBulk(Resource):
+    def get(self):
+        return export_ndjson(Enrollment, enroll_response, Enrollment.enrollment_id)
+
+    def post(self):
+        errors, candidates = [], []
+        for index, item in enumerate(read_bulk_items()):
+            if not isinstance(item, dict):
+                errors.append(item_error(index, 400, "BULK002", "Item must be a JSON object"))
+            elif not is_id(item.get("student_id")):
+                errors.append(item_error(index, 400, "ENROLLMENT002", "Student does not exist."))
+            elif not is_id(item.get("course_id")):
+                errors.append(item_error(index, 400, "ENROLLMENT001", "Course does not exist."))
+            else:
+                candidates.append((index, item["student_id"], item["course_id"]))
+
+        rows = insert_in_chunks(Enrollment, check_enrollments(candidates, errors), recheck_enrollments, errors)
+        response_cache.delete(*{enrollment_key(row["student_id"]) for _, row in rows})
+        return bulk_response(len(rows), errors)
         
 
 # Api Routing
+api.add_resource(StudentBulk, '/api/student/bulk')
+api.add_resource(CourseBulk, '/api/course/bulk')
+api.add_resource(EnrollmentBulk, '/api/enrollment/bulk')
 api.add_resource(Students, '/api/student', '/api/student/<int:student_id>')
 api.add_resource(Courses, '/api/course', '/api/course/<int:course_id>')
 api.add_resource(EnrollmentList, '/api/student/<int:student_id>/course/<int:course_id>', '/api/student/<int:student_id>/course')
 
+app = create_app()
+
 # Run
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
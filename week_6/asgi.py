@@ -0,0 +1,289 @@
+"""ASGI deployment of the week_6 API on SQLAlchemy's async engine (aiosqlite).
+
+Serves the same student, course and enrollment routes with the same
+response bodies and error contract as the Flask-RESTful app, without
+tying up a thread per request while SQLite I/O is in flight:
+
+    uvicorn --app-dir week_6 asgi:app --workers 4
+"""
+import json
+import os
+from urllib.parse import urlencode
+
+from flask_restful import marshal
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from werkzeug.datastructures import MultiDict
+
+from app import (Course, Enrollment, Student, course_response, current_dir, enroll_response, search_params,
+                 student_response)
+from common.search_index import RANK_LIMIT, search_statements
+from common.sqlite_config import configure_sqlite
+
+
+DATABASE_URI = os.environ.get(
+    "ASYNC_DATABASE_URI", f"sqlite+aiosqlite:///{os.path.join(current_dir, 'api_database.sqlite3')}"
+)
+engine = create_async_engine(DATABASE_URI, pool_size=int(os.environ.get("DB_POOL_SIZE", 8)))
+configure_sqlite(engine.sync_engine)
+Session = async_sessionmaker(engine, expire_on_commit=False)
+
+
+# Error Contract
+class ApiError(Exception):
+    def __init__(self, response):
+        self.response = response
+
+def validation_error(status_code, error_code, error_message):
+    # Same body and content type as ResourceValidationError in app.py.
+    message = {"error_code": error_code, "error_message": error_message}
+    return ApiError(Response(json.dumps(message), status_code, media_type="text/html"))
+
+def http_error(status_code, message):
+    # Same body as flask_restful's handling of abort(status_code, message).
+    return ApiError(JSONResponse({"message": message}, status_code))
+
+async def handle_api_error(request, exc):
+    return exc.response
+
+def missing(value):
+    return value is None or len(value)==0
+
+
+# Search
+async def search(request, model, response_format):
+    q, page, size = search_params(MultiDict(request.query_params.multi_items()))
+    statements = search_statements(model, q, size + 1, (page - 1) * size)
+    if statements is None:
+        raise validation_error(400, "SEARCH001", "Search query q is required")
+
+    probe, ranked, unranked = statements
+    async with Session() as session:
+        rows = (await session.scalars(ranked if await session.scalar(probe) <= RANK_LIMIT else unranked)).all()
+    headers = {}
+    if len(rows) > size:
+        headers["Link"] = f'<{request.url.path}?{urlencode({"q": q, "page": page + 1, "size": size})}>; rel="next"'
+    return JSONResponse(marshal(rows[:size], response_format), headers=headers)
+
+async def search_students(request):
+    return await search(request, Student, student_response)
+
+async def search_courses(request):
+    return await search(request, Course, course_response)
+
+
+# Student Routes
+async def get_student(request):
+    async with Session() as session:
+        student = await session.get(Student, request.path_params["student_id"])
+    if student is None:
+        raise http_error(404, "Student not found")
+    return JSONResponse(marshal(student, student_response))
+
+async def create_student(request):
+    args = await request.json()
+    roll_number = args.get("roll_number")
+    first_name = args.get("first_name")
+
+    if missing(roll_number):
+        raise validation_error(400, "STUDENT001", "Roll Number required")
+    if missing(first_name):
+        raise validation_error(400, "STUDENT002", "First Name is required")
+
+    async with Session() as session:
+        student = Student(roll_number=roll_number, first_name=first_name, last_name=args.get("last_name"))
+        session.add(student)
+        await commit_or_conflict(session, "Student already exist")
+    return JSONResponse(marshal(student, student_response), 201)
+
+async def update_student(request):
+    args = await request.json()
+    roll_number = args.get("roll_number")
+    first_name = args.get("first_name")
+
+    async with Session() as session:
+        student = await session.get(Student, request.path_params["student_id"])
+        if missing(roll_number):
+            raise validation_error(400, "STUDENT001", "Roll Number required")
+        elif missing(first_name):
+            raise validation_error(400, "STUDENT002", "First Name is required")
+        elif not student:
+            raise http_error(404, "Student not found")
+
+        student.roll_number = roll_number
+        student.first_name = first_name
+        student.last_name = args.get("last_name")
+        await commit_or_conflict(session, "Student already exist")
+    return JSONResponse(marshal(student, student_response))
+
+async def delete_student(request):
+    async with Session() as session:
+        student = await session.get(Student, request.path_params["student_id"])
+        if not student:
+            raise http_error(404, "Student not found")
+        await session.delete(student)
+        await session.commit()
+    return JSONResponse("Successfully Deleted")
+
+
+# Course Routes
+async def get_course(request):
+    async with Session() as session:
+        course = await session.get(Course, request.path_params["course_id"])
+    if course is None:
+        raise http_error(404, "Course not found")
+    return JSONResponse(marshal(course, course_response))
+
+async def create_course(request):
+    args = await request.json()
+    course_code = args.get("course_code")
+    course_name = args.get("course_name")
+
+    if missing(course_code):
+        raise validation_error(400, "COURSE002", "Course Code is required")
+    if missing(course_name):
+        raise validation_error(400, "COURSE001", "Course Name is required")
+
+    async with Session() as session:
+        course = Course(course_code=course_code, course_name=course_name,
+                        course_description=args.get("course_description"))
+        session.add(course)
+        await commit_or_conflict(session, "course_code already exist")
+    return JSONResponse(marshal(course, course_response), 201)
+
+async def update_course(request):
+    args = await request.json()
+    course_code = args.get("course_code")
+    course_name = args.get("course_name")
+
+    async with Session() as session:
+        course = await session.get(Course, request.path_params["course_id"])
+        if not course:
+            raise http_error(404, "Course not found")
+        elif missing(course_code):
+            raise validation_error(400, "COURSE002", "Course Code is required")
+        elif missing(course_name):
+            raise validation_error(400, "COURSE001", "Course Name is required")
+
+        course.course_code = course_code
+        course.course_name = course_name
+        course.course_description = args.get("course_description")
+        await commit_or_conflict(session, "course_code already exist")
+    return JSONResponse(marshal(course, course_response))
+
+async def delete_course(request):
+    async with Session() as session:
+        course = await session.get(Course, request.path_params["course_id"])
+        if not course:
+            raise http_error(404, "Course not found")
+        await session.delete(course)
+        await session.commit()
+    return JSONResponse("Successfully Deleted")
+
+
+# Enrollment Routes
+async def student_enrollments(session, student_id, course_id=None):
+    # One query: the student's enrollments, and whether course_id exists when one is given.
+    course_exists = select(Course.course_id).where(Course.course_id == course_id).exists()
+    rows = (await session.execute(
+        select(Enrollment.enrollment_id, Enrollment.course_id, course_exists.label("course_exists"))
+        .select_from(Student)
+        .outerjoin(Enrollment, Enrollment.student_id == Student.student_id)
+        .where(Student.student_id == student_id)
+        .order_by(Enrollment.enrollment_id)
+    )).all()
+    if not rows:
+        raise validation_error(400, "ENROLLMENT002", "Student does not exist.")
+    enrollments = [(row.enrollment_id, row.course_id) for row in rows if row.enrollment_id is not None]
+    return enrollments, rows[0].course_exists
+
+def enrollment_list(student_id, enrollments):
+    return [
+        marshal({"enrollment_id": enrollment_id, "student_id": student_id, "course_id": course_id}, enroll_response)
+        for enrollment_id, course_id in enrollments
+    ]
+
+async def get_enrollments(request):
+    student_id = request.path_params["student_id"]
+    async with Session() as session:
+        enrollments, _ = await student_enrollments(session, student_id)
+    if not enrollments:
+        raise http_error(404, "Student is not enrolled in any course")
+    return JSONResponse(enrollment_list(student_id, enrollments))
+
+async def create_enrollment(request):
+    student_id = request.path_params["student_id"]
+    course_id = (await request.json()).get("course_id")
+
+    async with Session() as session:
+        enrollments, course_exists = await student_enrollments(session, student_id, course_id)
+        if not course_exists:
+            raise validation_error(400, "ENROLLMENT001", "Course does not exist.")
+        if any(enrolled_course == course_id for _, enrolled_course in enrollments):
+            raise validation_error(409, "ENROLLMENT004", "Student is already enrolled in the course.")
+
+        try:
+            enrollment_id = (await session.execute(
+                insert(Enrollment).values(student_id=student_id, course_id=course_id).returning(Enrollment.enrollment_id)
+            )).scalar_one()
+            await session.commit()
+        except IntegrityError:
+            raise validation_error(409, "ENROLLMENT004", "Student is already enrolled in the course.")
+
+    enrollments.append((enrollment_id, course_id))
+    return JSONResponse(enrollment_list(student_id, enrollments), 201)
+
+async def delete_enrollment(request):
+    student_id = request.path_params["student_id"]
+    course_id = request.path_params["course_id"]
+
+    async with Session() as session:
+        deleted = (await session.execute(
+            delete(Enrollment)
+            .where(Enrollment.student_id == student_id, Enrollment.course_id == course_id)
+            .returning(Enrollment.enrollment_id)
+        )).first()
+        await session.commit()
+        if deleted:
+            return JSONResponse("Successfully Deleted")
+
+        student_exists = select(Student.student_id).where(Student.student_id == student_id).exists()
+        course_exists = select(Course.course_id).where(Course.course_id == course_id).exists()
+        found = (await session.execute(select(student_exists.label("student"), course_exists.label("course")))).one()
+    if not found.student:
+        raise validation_error(400, "ENROLLMENT002", "Student does not exist")
+    if not found.course:
+        raise validation_error(400, "ENROLLMENT001", "Course does not exist")
+    raise http_error(404, "Enrollment for the student not found")
+
+
+async def commit_or_conflict(session, message):
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise http_error(409, message)
+
+
+# Api Routing
+routes = [
+    Route('/api/student', search_students, methods=['GET']),
+    Route('/api/student', create_student, methods=['POST']),
+    Route('/api/student/{student_id:int}', get_student, methods=['GET']),
+    Route('/api/student/{student_id:int}', update_student, methods=['PUT']),
+    Route('/api/student/{student_id:int}', delete_student, methods=['DELETE']),
+    Route('/api/course', search_courses, methods=['GET']),
+    Route('/api/course', create_course, methods=['POST']),
+    Route('/api/course/{course_id:int}', get_course, methods=['GET']),
+    Route('/api/course/{course_id:int}', update_course, methods=['PUT']),
+    Route('/api/course/{course_id:int}', delete_course, methods=['DELETE']),
+    Route('/api/student/{student_id:int}/course', get_enrollments, methods=['GET']),
+    Route('/api/student/{student_id:int}/course', create_enrollment, methods=['POST']),
+    Route('/api/student/{student_id:int}/course/{course_id:int}', delete_enrollment, methods=['DELETE']),
+]
+
+app = Starlette(routes=routes, exception_handlers={ApiError: handle_api_error})
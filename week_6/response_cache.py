@@ -0,0 +1,185 @@
+"""Response caches for the week_6 GET endpoints.
+
+``local`` keeps entries in each process and checks them against key
+versions held in a memory-mapped file shared by every gunicorn worker: a
+write in one worker bumps the versions of the keys it invalidates, so the
+other workers' copies stop matching and are rebuilt on their next GET.
+``shared`` stores the entries themselves in a redis server.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, request
+
+from common.versions import VersionCounters
+
+
+class LocalCache:
+    """In-process cache with a per-entry TTL and least-recently-used eviction.
+
+    With ``versions`` (a VersionCounters) an entry is only served while its key's
+    version is the one read before the response was built, so invalidations
+    reach every worker process sharing the versions file.
+    """
+
+    def __init__(self, max_entries=10000, ttl=300, versions=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.versions = versions
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def version(self, key):
+        return None if self.versions is None else self.versions.get(key)[0]
+
+    def get(self, key):
+        version = self.version(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires, entry_version = entry
+            if expires < time.monotonic() or entry_version != version:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, version=None):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl, version)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        if self.versions is not None and keys:
+            self.versions.bump(*keys)
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        if self.versions is not None:
+            self.versions.bump_all()
+        with self._lock:
+            self._entries.clear()
+
+
+class NullCache:
+    """Disables caching: every lookup misses and nothing is stored."""
+
+    def version(self, key):
+        return None
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, version=None):
+        pass
+
+    def delete(self, *keys):
+        pass
+
+    def clear(self):
+        pass
+
+
+class SharedCache:
+    """Cache stored in a shared server so every worker sees the same entries and invalidations.
+
+    Entries carry the version of their key, kept in the server next to them:
+    a GET that read its rows before a concurrent write, but stores them after
+    that write's delete, files them under the superseded version, and they are
+    never served.
+    """
+
+    def __init__(self, client, ttl=300, prefix="week6:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _version_key(self, key):
+        return f"{self.prefix}version:{key}"
+
+    def version(self, key):
+        return _text(self.client.get(self._version_key(key)))
+
+    def get(self, key):
+        value, version = self.client.mget([self.prefix + key, self._version_key(key)])
+        if value is None:
+            return None
+        entry = json.loads(value)
+        return entry["value"] if entry["version"] == _text(version) else None
+
+    def set(self, key, value, version=None):
+        self.client.set(self.prefix + key, json.dumps({"version": version, "value": value}), ex=self.ttl)
+
+    def delete(self, *keys):
+        if keys:
+            pipeline = self.client.pipeline()
+            for key in keys:
+                pipeline.incr(self._version_key(key))
+            pipeline.delete(*(self.prefix + key for key in keys))
+            pipeline.execute()
+
+    def clear(self):
+        self.client.flushdb()
+
+
+def _text(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def make_cache(config):
+    """The cache named by RESPONSE_CACHE: ``local`` (the default), ``shared`` or ``none``.
+
+    ``shared`` needs RESPONSE_CACHE_URL; without one it falls back to ``local``,
+    whose versions file keeps the worker processes of one host consistent.
+    """
+    backend = config.get('RESPONSE_CACHE', 'local')
+    ttl = config.get('RESPONSE_CACHE_TTL', 300)
+    if backend == 'none':
+        return NullCache()
+    if backend == 'shared' and config.get('RESPONSE_CACHE_URL'):
+        import redis
+        return SharedCache(redis.Redis.from_url(config['RESPONSE_CACHE_URL']), ttl=ttl)
+    if backend in ('local', 'shared'):
+        return LocalCache(max_entries=config.get('RESPONSE_CACHE_SIZE', 10000), ttl=ttl,
+                          versions=VersionCounters(config['RESPONSE_CACHE_VERSIONS']))
+    raise ValueError(f"Unknown RESPONSE_CACHE backend {backend!r}")
+
+
+def etag_for(body):
+    return hashlib.sha1(json.dumps(body, sort_keys=True).encode()).hexdigest()
+
+
+def cached_get(cache, key_for):
+    """Serve a Resource GET from ``cache``, answering If-None-Match with 304 without calling the handler.
+
+    Only successful responses are stored; errors raised by the handler pass through uncached.
+    """
+    def decorator(get):
+        @wraps(get)
+        def wrapper(self, *args, **kwargs):
+            key = key_for(**kwargs)
+            entry = cache.get(key)
+            if entry is None:
+                # Read before the handler queries, so a response built during a
+                # concurrent write is filed under the version that write replaces.
+                version = cache.version(key)
+                rv = get(self, *args, **kwargs)
+                body, status = rv[0], rv[1]
+                entry = {"body": body, "status": status, "etag": etag_for(body)}
+                if status == 200:
+                    cache.set(key, entry, version)
+
+            if entry["etag"] in request.if_none_match:
+                return Response(status=304, headers={"ETag": f'"{entry["etag"]}"'})
+            return entry["body"], entry["status"], {"ETag": f'"{entry["etag"]}"'}
+        return wrapper
+    return decorator
@@ -1,38 +1,162 @@
 import os
-from flask import Flask, render_template, request, redirect, url_for
+import sys
+import time
+import click
+from flask import Blueprint, Flask, current_app, render_template, stream_template, request, redirect, url_for
+from flask.cli import with_appcontext
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import bindparam, event, func, inspect, select
+from sqlalchemy.orm import joinedload
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.instrumentation import init_instrumentation
+from common.sqlite_config import init_database
+from common.repository import LEGACY_ENROLLMENTS, Repository
+from common.versions import VersionCounters
+from common.search_index import RANK_LIMIT, install_search, search_statements
+from page_cache import PageCache, bump_versions, cached_page, current_versions
 
 
 # App Initialization
-app = Flask(__name__)
 current_dir = os.path.abspath(os.path.dirname(__file__))
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(current_dir, 'week7_database.sqlite3')}"
 db = SQLAlchemy()
-db.init_app(app)
-app.app_context().push()
+bp = Blueprint('main', __name__)
+
+def create_app(config=None):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(current_dir, 'week7_database.sqlite3')}"
+    app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 8))
+    app.config['INSTRUMENTATION'] = bool(os.environ.get('INSTRUMENTATION'))
+    app.config['PAGE_SIZE'] = 50
+    app.config['MAX_PAGE_SIZE'] = 500
+    app.config['COUNT_TTL'] = 30
+    app.config['PAGE_CACHE'] = os.environ.get('PAGE_CACHE', 'on') != 'off'
+    app.config['PAGE_CACHE_VERSIONS'] = os.path.join(current_dir, 'week7_database.sqlite3.versions')
+    app.config['PAGE_CACHE_BYTES'] = int(os.environ.get('PAGE_CACHE_BYTES', 64 * 1024 * 1024))
+    app.config.update(config or {})
+    engine = init_database(app, db, upgrade_schema)
+    if app.config['INSTRUMENTATION']:
+        init_instrumentation(app, engine)
+    if app.config['PAGE_CACHE']:
+        app.extensions['page_cache'] = PageCache(VersionCounters(app.config['PAGE_CACHE_VERSIONS']),
+                                                    app.config['PAGE_CACHE_BYTES'])
+    app.register_blueprint(bp)
+    app.cli.add_command(rebuild_course_stats)
+    app.cli.add_command(rebuild_search_index)
+    return app
+
+
+def upgrade_schema(engine):
+    schema = inspect(engine)
+    if schema.has_table('enrollments') and not schema.has_table('course_stats'):
+        with engine.begin() as conn:
+            install_course_stats(conn)
+    if schema.has_table('student') and not schema.has_table('student_search'):
+        with engine.begin() as conn:
+            install_search(conn)
 
 
 # DB Models
-class Student(db.Model):
-    __tablename__ = "student"
-    student_id = db.Column(db.Integer,primary_key=True,autoincrement=True)
-    roll_number = db.Column(db.String,unique=True,nullable=False)
-    first_name= db.Column(db.String,nullable=False)
-    last_name= db.Column(db.String)
-
-class Course(db.Model):
-    __tablename__ = "course"
-    course_id = db.Column(db.Integer,primary_key=True,autoincrement=True)
-    course_code = db.Column(db.String,unique=True,nullable=False)
-    course_name= db.Column(db.String,nullable=False)
-    course_description= db.Column(db.String)
-    student=db.relationship("Student", secondary="enrollments")
-
-class Enrollments(db.Model):
-    __tablename__ = "enrollments"
-    enrollment_id=db.Column(db.Integer,primary_key=True,nullable=False)
-    estudent_id = db.Column(db.Integer,db.ForeignKey("student.student_id"),nullable=False)
-    ecourse_id = db.Column(db.Integer,db.ForeignKey("course.course_id"),nullable=False)
+repo = Repository(db, LEGACY_ENROLLMENTS)
+Student, Course, Enrollment = repo.Student, repo.Course, repo.Enrollment
+
+class CourseStats(db.Model):
+    # Maintained by the SQLite triggers below, so Core bulk inserts and deletes keep it current too.
+    __tablename__ = "course_stats"
+    course_id = db.Column(db.Integer,db.ForeignKey("course.course_id"),primary_key=True)
+    enrollment_count = db.Column(db.Integer,nullable=False,default=0)
+
+Course.stats = db.relationship(CourseStats, uselist=False, viewonly=True)
+COURSE_DETAIL = (select(Course).options(joinedload(Course.students), joinedload(Course.stats))
+                 .where(Course.course_id == bindparam("course_id")))
+
+
+# Course Stats
+COURSE_STATS_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS course_stats_course_insert AFTER INSERT ON course BEGIN
+        INSERT OR IGNORE INTO course_stats (course_id, enrollment_count) VALUES (NEW.course_id, 0);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS course_stats_course_delete AFTER DELETE ON course BEGIN
+        DELETE FROM course_stats WHERE course_id = OLD.course_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS course_stats_enrollment_insert AFTER INSERT ON enrollments BEGIN
+        UPDATE course_stats SET enrollment_count = enrollment_count + 1 WHERE course_id = NEW.ecourse_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS course_stats_enrollment_delete AFTER DELETE ON enrollments BEGIN
+        UPDATE course_stats SET enrollment_count = enrollment_count - 1 WHERE course_id = OLD.ecourse_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS course_stats_enrollment_update AFTER UPDATE OF ecourse_id ON enrollments BEGIN
+        UPDATE course_stats SET enrollment_count = enrollment_count - 1 WHERE course_id = OLD.ecourse_id;
+        UPDATE course_stats SET enrollment_count = enrollment_count + 1 WHERE course_id = NEW.ecourse_id;
+    END""",
+]
+REBUILD_COURSE_STATS = [
+    "DELETE FROM course_stats",
+    """INSERT INTO course_stats (course_id, enrollment_count)
+        SELECT course.course_id, COUNT(enrollments.enrollment_id) FROM course
+        LEFT JOIN enrollments ON enrollments.ecourse_id = course.course_id
+        GROUP BY course.course_id""",
+]
+
+def install_course_stats(conn):
+    CourseStats.__table__.create(conn, checkfirst=True)
+    for statement in COURSE_STATS_TRIGGERS + REBUILD_COURSE_STATS:
+        conn.exec_driver_sql(statement)
+
+# create_all, and create_app on a database from before course_stats, install the triggers and backfill it.
+@event.listens_for(db.metadata, "after_create")
+def course_stats_after_create(target, connection, **kw):
+    install_course_stats(connection)
+    install_search(connection)
+
+@click.command("rebuild-course-stats")
+@with_appcontext
+def rebuild_course_stats():
+    """Recompute course_stats from the enrollments table."""
+    with db.engine.begin() as conn:
+        install_course_stats(conn)
+    click.echo(f"course_stats rebuilt for {db.session.query(func.count()).select_from(CourseStats).scalar()} courses")
+
+@click.command("rebuild-search-index")
+@with_appcontext
+def rebuild_search_index():
+    """Rebuild the student and course full-text indexes from their tables."""
+    with db.engine.begin() as conn:
+        install_search(conn)
+    click.echo("search indexes rebuilt")
+
+
+# Pagination Helpers
+_row_counts = {}
+
+def cached_count(model):
+    # Keyed on the shared data version too, so a write in any worker retires every worker's count.
+    version = current_versions(model.__tablename__)
+    hit = _row_counts.get(model.__tablename__)
+    now = time.monotonic()
+    if hit and hit[2] == version and now - hit[1] < current_app.config['COUNT_TTL']:
+        return hit[0]
+    total = db.session.query(func.count()).select_from(model).scalar()
+    _row_counts[model.__tablename__] = (total, now, version)
+    return total
+
+def forget_count(model):
+    _row_counts.pop(model.__tablename__, None)
+
+def keyset_page(model, key, options=()):
+    size = request.args.get('size', current_app.config['PAGE_SIZE'], type=int)
+    size = max(1, min(size, current_app.config['MAX_PAGE_SIZE']))
+    after = request.args.get('after', type=int)
+    start = request.args.get('start', 0, type=int)
+
+    query = model.query.options(*options)
+    if after is not None:
+        query = query.filter(key > after)
+    rows = query.order_by(key).limit(size + 1).all()
+    page = rows[:size]
+    next_args = None
+    if len(rows) > size:
+        next_args = {'after': getattr(page[-1], key.key), 'start': start + size, 'size': size}
+    return page, start, next_args
 
 
 # API Implementation
@@ -40,32 +164,36 @@ class Enrollments(db.Model):
 # Student API
 
 # List of all Students GET
-@app.route('/')
+@bp.route('/')
+@cached_page('student')
 def home():
-    students = Student.query.all()
-    return render_template('index.html', students=students, len=len(students))
+    students, start, next_args = keyset_page(Student, Student.student_id)
+    return stream_template('index.html', students=students, start=start, total=cached_count(Student),
+                           next_url=url_for('.home', **next_args) if next_args else None)
 
 # Student Detail GET
-@app.route('/student/<int:student_id>')
+@bp.route('/student/<int:student_id>')
+@cached_page('student', 'course', 'enrollments')
 def get_student_detail(student_id):
-    student = Student.query.filter(Student.student_id == student_id).first()
-    enrolled_courses = Course.query.join(Enrollments).filter(Enrollments.estudent_id == student_id).all()
+    student = repo.student_with_courses(student_id)
+    enrolled_courses = student.courses if student else []
     return render_template('student_detail.html', student=student, enrolled_courses=enrolled_courses)
 
 # Withdraw a Course GET
-@app.route('/student/<int:student_id>/withdraw/<int:course_id>')
+@bp.route('/student/<int:student_id>/withdraw/<int:course_id>')
 def withdraw_course(student_id, course_id):
-    enrollment = Enrollments.query.filter(Enrollments.estudent_id == student_id, Enrollments.ecourse_id == course_id).first()
+    enrollment = repo.enrollment(student_id, course_id)
     if enrollment:
         db.session.delete(enrollment)
         db.session.commit()
+        bump_versions('enrollments')
     
     return redirect("/")
 
 # Student Create GET/POST
-@app.route('/student/create', methods=['GET', 'POST'])
+@bp.route('/student/create', methods=['GET', 'POST'])
 def add_student():
-    courses = Course.query.all()
+    courses = repo.courses()
     if request.method == 'GET':
         return render_template('add_student.html', courses=courses)
     elif request.method == 'POST':
@@ -74,76 +202,104 @@ def add_student():
         l_name = request.form.get('l_name')
         enrolled_courses = request.form.getlist('courses')
 
-        existing_student = Student.query.filter(Student.roll_number == roll_number).first()
+        existing_student = repo.student_by_roll(roll_number)
         if existing_student:
             return render_template('already_exists.html', flag='student')
 
         new_student = Student(roll_number=roll_number, first_name=f_name, last_name=l_name)
         db.session.add(new_student)
+        db.session.flush()
+        repo.add_enrollments(new_student.student_id, {int(c) for c in enrolled_courses})
         db.session.commit()
-
-        for enrolled_course in enrolled_courses:
-            course_id = enrolled_course
-            new_enrollment = Enrollments(estudent_id=new_student.student_id, ecourse_id=course_id)
-            db.session.add(new_enrollment)
-            db.session.commit()
+        forget_count(Student)
+        bump_versions('student', 'enrollments')
 
         return redirect('/')
 
 # Student Update GET/POST
-@app.route('/student/<int:student_id>/update', methods=['GET', 'POST'])
+@bp.route('/student/<int:student_id>/update', methods=['GET', 'POST'])
 def update_student(student_id):
-    student = Student.query.filter(Student.student_id == student_id).first()
-    courses = Course.query.all()
+    student = repo.student(student_id)
+    courses = repo.courses()
     if request.method == 'GET':
         return render_template('update_student.html', student=student, courses=courses)
     elif request.method == 'POST':
         student.first_name = request.form.get('f_name')
         student.last_name = request.form.get('l_name')
 
-        updated_enrollment = request.form.getlist('courses')
-        Enrollments.query.filter(Enrollments.estudent_id == student_id).delete()
+        updated_enrollment = {int(c) for c in request.form.getlist('courses')}
+        current_enrollment = repo.course_ids_of(student_id)
 
-        for enrolled_course in updated_enrollment:
-            course_id = enrolled_course
-            new_enrollment = Enrollments(estudent_id=student.student_id, ecourse_id=course_id)
-            db.session.add(new_enrollment)
+        withdrawn = current_enrollment - updated_enrollment
+        if withdrawn:
+            Enrollment.query.filter(Enrollment.student_id == student_id, Enrollment.course_id.in_(withdrawn)).delete(synchronize_session=False)
+        repo.add_enrollments(student_id, updated_enrollment - current_enrollment)
 
         db.session.commit()
+        bump_versions('student', 'enrollments')
 
         return redirect('/')
 
 # Student Delete GET
-@app.route('/student/<int:student_id>/delete')
+@bp.route('/student/<int:student_id>/delete')
 def delete_student(student_id):
-    student = Student.query.filter(Student.student_id == student_id).first()
+    student = repo.student(student_id)
 
     if student:
-        Enrollments.query.filter(Enrollments.estudent_id == student.student_id).delete()
+        Enrollment.query.filter(Enrollment.student_id == student.student_id).delete()
 
         db.session.delete(student)
         db.session.commit()
+        forget_count(Student)
+        bump_versions('student', 'enrollments')
 
     return redirect('/')
 
 
+# Search GET
+@bp.route('/search')
+@cached_page('student', 'course')
+def search():
+    q = request.args.get('q', '')
+    page = max(1, request.args.get('page', 1, type=int))
+    size = max(1, min(request.args.get('size', current_app.config['PAGE_SIZE'], type=int), current_app.config['MAX_PAGE_SIZE']))
+
+    results = {}
+    has_next = False
+    for name, model in (('students', Student), ('courses', Course)):
+        statements = search_statements(model, q, size + 1, (page - 1) * size)
+        rows = []
+        if statements is not None:
+            probe, ranked, unranked = statements
+            rows = db.session.scalars(ranked if db.session.scalar(probe) <= RANK_LIMIT else unranked).all()
+        has_next = has_next or len(rows) > size
+        results[name] = rows[:size]
+    return render_template('search.html', q=q, page=page, start=(page - 1) * size, **results,
+                           next_url=url_for('.search', q=q, page=page + 1, size=size) if has_next else None)
+
+
 # Course API
 
 # List of all Courses GET
-@app.route('/courses')
+@bp.route('/courses')
+@cached_page('course', 'enrollments')
 def get_courses():
-    courses = Course.query.all()
-    return render_template('course_list.html', courses=courses, len=len(courses))
+    courses, start, next_args = keyset_page(Course, Course.course_id, options=[joinedload(Course.stats)])
+    return stream_template('course_list.html', courses=courses, start=start, total=cached_count(Course),
+                           next_url=url_for('.get_courses', **next_args) if next_args else None)
     
 # Course Detail GET
-@app.route('/course/<int:course_id>')
+@bp.route('/course/<int:course_id>')
+@cached_page('student', 'course', 'enrollments')
 def get_course_detail(course_id):
-    course = Course.query.filter(Course.course_id == course_id).first()
-    enrolled_students = Student.query.join(Enrollments).filter(Enrollments.ecourse_id == course_id).all()
-    return render_template('course_detail.html', course=course, enrolled_students=enrolled_students)
+    course = repo.first(COURSE_DETAIL, course_id=course_id)
+    enrolled_students = course.students if course else []
+    enrollment_count = course.stats.enrollment_count if course and course.stats else 0
+    return render_template('course_detail.html', course=course, enrolled_students=enrolled_students,
+                           enrollment_count=enrollment_count)
 
 # Course Create GET
-@app.route('/course/create', methods=['GET', 'POST'])
+@bp.route('/course/create', methods=['GET', 'POST'])
 def add_course():
     if request.method == 'GET':
         return render_template('add_course.html')
@@ -152,42 +308,49 @@ def add_course():
         course_name = request.form.get('c_name')
         course_desc = request.form.get('desc')
 
-        existing_course = Course.query.filter(Course.course_code == course_code).first()
+        existing_course = repo.course_by_code(course_code)
         if existing_course:
             return render_template('already_exists.html')
 
         new_course = Course(course_code=course_code, course_name=course_name, course_description=course_desc)
         db.session.add(new_course)
         db.session.commit()
+        forget_count(Course)
+        bump_versions('course')
 
         return redirect('/courses')
     
 # Course Update GET/POST
-@app.route('/course/<int:course_id>/update', methods=['GET', 'POST'])
+@bp.route('/course/<int:course_id>/update', methods=['GET', 'POST'])
 def update_course(course_id):
-    course = Course.query.filter(Course.course_id == course_id).first()
+    course = repo.course(course_id)
     if request.method == 'GET':
         return render_template('update_course.html', course=course)
     elif request.method == 'POST':
         course.course_name = request.form.get('c_name')
         course.course_description = request.form.get('desc')
         db.session.commit()
+        bump_versions('course')
 
     return redirect('/courses')
 
 # Course Delete GET
-@app.route('/course/<int:course_id>/delete')
+@bp.route('/course/<int:course_id>/delete')
 def delete_course(course_id):
-    course = Course.query.filter(Course.course_id == course_id).first()
+    course = repo.course(course_id)
 
     if course:
-        Enrollments.query.filter(Enrollments.ecourse_id == course_id).delete()
+        Enrollment.query.filter(Enrollment.course_id == course_id).delete()
 
         db.session.delete(course)
         db.session.commit()
+        forget_count(Course)
+        bump_versions('course', 'enrollments')
 
     return redirect('/')
     
 
+app = create_app()
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
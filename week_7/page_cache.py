@@ -0,0 +1,139 @@
+"""Rendered-page cache for the week_7 views, invalidated by per-table data versions.
+
+A cached page is keyed on its URL and the current versions of the tables it
+reads. Write handlers call ``bump_versions`` after committing, which makes
+every page built from the old data unreachable. The counters are a
+common.versions.VersionCounters file, so all gunicorn workers see the same versions; the pages
+are cached per process, stored pre-compressed (gzip, and brotli when the
+``brotli`` package is installed) and answered with 304 on a matching
+If-None-Match. Streamed pages keep streaming and are stored once fully sent.
+
+Writes made outside the app (scripts, sqlite3 shell) do not bump versions.
+"""
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, current_app, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_COMPRESS_SIZE = 512
+
+
+class CachedPage:
+    def __init__(self, body, content_type):
+        self.content_type = content_type
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.variants = {'identity': (body, digest)}
+        if len(body) >= MIN_COMPRESS_SIZE:
+            self.variants['gzip'] = (gzip.compress(body, compresslevel=6, mtime=0), f"{digest}-gzip")
+            if brotli is not None:
+                self.variants['br'] = (brotli.compress(body, quality=5), f"{digest}-br")
+        self.size = sum(len(body) for body, _ in self.variants.values())
+
+    def respond(self):
+        offered = [encoding for encoding in ('br', 'gzip') if encoding in self.variants]
+        encoding = request.accept_encodings.best_match(offered, default='identity')
+        body, etag = self.variants[encoding]
+        headers = {'ETag': f'"{etag}"', 'Vary': 'Accept-Encoding', 'Cache-Control': 'no-cache'}
+        if request.if_none_match.contains(etag):
+            return Response(status=304, headers=headers)
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        return Response(body, content_type=self.content_type, headers=headers)
+
+
+class PageCache:
+    """Least-recently-used pages, bounded by the total size of their stored variants.
+
+    Every query string is its own key, so the bound is on bytes rather than
+    entries: a crawl over many large variants of one page cannot grow a
+    worker past ``max_bytes``.
+    """
+
+    def __init__(self, versions, max_bytes=64 * 1024 * 1024):
+        self.versions = versions
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            page = self._entries.get(key)
+            if page is not None:
+                self._entries.move_to_end(key)
+            return page
+
+    def set(self, key, page):
+        if page.size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous.size
+            self._entries[key] = page
+            self.size += page.size
+            while self.size > self.max_bytes:
+                self.size -= self._entries.popitem(last=False)[1].size
+
+
+def bump_versions(*tables):
+    cache = current_app.extensions.get('page_cache')
+    if cache is not None:
+        cache.versions.bump(*tables)
+
+
+def cached_page(*tables):
+    """Serve a GET view from the page cache while none of ``tables`` has changed."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = current_app.extensions.get('page_cache')
+            if cache is None or request.method != 'GET':
+                return view(*args, **kwargs)
+
+            # Versions are read before the view queries, so a page rendered
+            # during a concurrent write is filed under the superseded version.
+            key = (request.full_path, cache.versions.get(*tables))
+            page = cache.get(key)
+            if page is None:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                if response.is_streamed:
+                    # Reading a streamed page whole would stop it streaming; it is
+                    # sent as rendered and cached once the last chunk has gone out.
+                    response.response = _tee(response.response,
+                                             lambda body: cache.set(key, CachedPage(body, response.content_type)))
+                    return response
+                page = CachedPage(response.get_data(), response.content_type)
+                cache.set(key, page)
+            return page.respond()
+        return wrapper
+    return decorator
+
+
+def _tee(chunks, store):
+    body = []
+    try:
+        for chunk in chunks:
+            body.append(chunk if isinstance(chunk, bytes) else chunk.encode())
+            yield chunk
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+    # Not reached when the client disconnects mid-page, so partial pages are never cached.
+    store(b''.join(body))
+
+
+def current_versions(*tables):
+    """The tables' data versions, or None when the page cache (and with it the shared counters) is off."""
+    cache = current_app.extensions.get('page_cache')
+    return None if cache is None else cache.versions.get(*tables)